@@ -4,34 +4,14 @@ import pygame
 from pygame.sprite import Sprite
 
 class Alien(Sprite):
-    """A class to represent a single alien in the fleet."""
+    """A class to hold the alien sprite.
+
+    The Fleet moves and draws every alien itself, from arrays; an Alien is
+    only the prototype it takes the sprite's image and size from.
+    """
 
     def __init__(self, ai_game):
-        """Initialize the alien and set its starting position."""
+        """Find the alien image in the atlas and set its rect attribute."""
         super().__init__()
-        self.screen = ai_game.screen
-        self.settings = ai_game.settings
-
-        # Load the alien image and set its rect attribute.
-        self.image = pygame.image.load('images/alien.bmp')
-        self.rect = self.image.get_rect()
-
-        # Start each new alien near the top left of the screen.
-        self.rect.x = self.rect.width
-        self.rect.y = self.rect.height
-
-        # Store the alien's exact horizontal position.
-        self.x = float(self.rect.x)
-
-    def check_edges(self):
-        """Return True if alien is at edge of screen."""
-        screen_rect = self.screen.get_rect()
-        if self.rect.right >= screen_rect.right or self.rect.left <= 0:
-            return True
-
-    def update(self):
-        """Move the alien to the right."""
-        self.x += (self.settings.alien_speed * self.settings.fleet_direction)
-        self.rect.x = self.x
-
-        
\ No newline at end of file
+        self.atlas, self.area = ai_game.assets.region('images/alien.bmp')
+        self.rect = pygame.Rect((0, 0), self.area.size)
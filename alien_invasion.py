@@ -3,8 +3,9 @@
 
 # NOTE: Create and use a Git repository (+ pushing online) during code refactoring.
 
+import os
 import sys
-from time import sleep
+from time import perf_counter_ns
 
 import pygame
 import random
@@ -12,58 +13,142 @@ from settings import Settings
 from game_stats import GameStats
 from scoreboard import Scoreboard
 from ship import Ship
-from bullet import Bullet
-from alien import Alien
+from bullet import BulletPool
+from fleet import Fleet
+from formations import FormationBook
 from button import Button
 from powerup import PowerUp
+from assets import AssetCache
+from timestep import FixedTimestep
+import audio
+from renderer import RENDERERS
+from controls import Controls
+from capture import FrameCapture
+from presenter import PRESENTERS, SurfacePresenter
+from text import GlyphAtlas
+from startup import StartupTimer, LoadingScreen
+from leaderboard import Leaderboard
+from replay import Recorder
+from savestate import Rewind, save_game, load_game
+from profiler import (FrameProfiler, ProfilerOverlay, EVENTS, SHIP, BULLETS,
+    ALIENS, POWERUPS, SCREEN, FLIP)
+from game_state import (GameState, PLAYING, RESPAWN_PAUSE, POWERUP_FLASH,
+    GAME_OVER)
 
 class AlienInvasion:
     """Overall class to manage game assets and behavior."""
 
-    def __init__(self):
-        """Initialize the game, and create game resources."""
-        pygame.init()
+    def __init__(self, headless=False):
+        """Initialize the game, and create game resources.
+
+        A headless game uses SDL's dummy video and audio drivers, loads no
+        sounds and is driven through step() instead of run_game().
+        """
+        self.headless = headless
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+        self.startup = StartupTimer()
         self.settings = Settings()
 
-        # 3 lines below produce full screen mode. TESTED - DO NOT USE. Only as reference. Not compatible with G9
-        # self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-        # self.settings.screen_width = self.screen.get.rect().width
-        # self.settings.screen_height = self.screen.get_rect().height
+        # Open the window before anything else, so there is something on
+        # screen while the rest of pygame starts and the assets load.
+        pygame.display.init()
+
+        # Everything is drawn at the logical screen size, whatever the size
+        # of the window; the presenter scales the frame to fit it. Headless
+        # games have no window to scale to.
+        size = (self.settings.screen_width, self.settings.screen_height)
+        if headless:
+            self.presenter = SurfacePresenter(size, "Alien Invasion")
+        else:
+            self.presenter = PRESENTERS[self.settings.presenter](size,
+                "Alien Invasion", self.settings.fullscreen,
+                self.settings.window_size, self.settings.vsync)
+        self.screen = self.presenter.screen
+        self.screen.fill(self.settings.bg_color)
+        self.presenter.present()
+        self.startup.stage('window')
+
+        if not headless:
+            audio.pre_init(self.settings)
+        pygame.init()
+        self.startup.stage('pygame.init')
+
+        # The simulation runs in fixed steps; drawing runs at its own rate.
+        self.clock = pygame.time.Clock()
+        self.timestep = FixedTimestep(self.settings.tick_rate,
+            self.settings.max_frame_time)
+
+        # Images are loaded once and shared, packed into one texture atlas.
+        # Outside headless runs, the atlas and sounds are read on worker
+        # threads behind a loading screen; sounds are named in audio.SOUNDS.
+        self.assets = AssetCache(target=self.screen)
+        self.audio = audio.NullAudio()
+        if not headless:
+            self.assets.preload()
+            try:
+                self.audio = audio.AudioManager(self.settings)
+            except pygame.error as e:
+                print(f"No sound: {e}")
+            loading = LoadingScreen(self.presenter, self.settings.bg_color)
+            if not loading.wait(self.assets.preload_progress,
+                    self.audio.progress):
+                sys.exit()
+            self.startup.stage('loading')
+
+        self.renderer = RENDERERS[self.settings.renderer](self.presenter,
+            self.settings.bg_color)
+        self.profiler = FrameProfiler(self.settings.profile)
+        self.profiler_overlay = None
+        self.frame_rates = {}
 
-        # 3 Lines below for windowed mode. Comment out to switch to fullscreen.
-        self.screen = pygame.display.set_mode(
-            (self.settings.screen_width, self.settings.screen_height))
-        pygame.display.set_caption("Alien Invasion")
+        # Scores are kept per difficulty. Headless games keep theirs in
+        # memory so they don't fill up the player's leaderboard.
+        self.leaderboard = Leaderboard(None if headless else
+            'files/leaderboard.db', difficulties=self.settings.difficulties)
+        self.startup.stage('leaderboard')
 
         # Create an instance to store game statistics, and create a scoreboard.
         self.stats = GameStats(self)
+        self.state = GameState()
         self.sb = Scoreboard(self)
 
         self.ship = Ship(self)
-        self.bullets = pygame.sprite.Group()
-        self.aliens = pygame.sprite.Group()
-
+        # The second player's ship in a networked game; see netplay.py.
+        self.partner = None
+        # The NetHost serving that game, if this is its host.
+        self.net = None
+        self.controls = Controls(self, self.settings.input_mode)
+        # Recording of presented frames; F9 toggles it.
+        self.capture = None
+        if self.settings.capture and not headless:
+            self._toggle_capture()
+        self.bullets = BulletPool(self, self.settings.bullets_allowed)
+        self.aliens = Fleet(self)
+
+        # Fleet layouts come from a data file and are compiled once.
+        self.formations = FormationBook()
         self._create_fleet()
 
-        # Make the Play button
-        self.normal_button = Button(self, "Normal", (0, 255, 0), 0)
-        self.hard_button = Button(self, "Hard", (255, 255, 0), 60)
-        self.nightmare_button = Button(self, "Nightmare", (255, 0, 0), 120)
-
-        # NOTE: For more sound files, use a dictionary. Example below
-        # self.sounds = {"laser: pygame.mixer.Sound('sounds/LaserGun.wav)"}
-        # self.sounds["laser"].play()
-        pygame.mixer.init()
-        self.ship_laser_sound = pygame.mixer.Sound('sounds/LaserGun.wav')
-        self.level_success_sound = pygame.mixer.Sound('sounds/success.wav')
-        self.player_hit_sound = pygame.mixer.Sound('sounds/player_hit.wav')
-        self.game_over_sound = pygame.mixer.Sound('sounds/game_over.wav')
-        self.powerup_bullet_sound = pygame.mixer.Sound('sounds/blaster.wav')
-        self.powerup_sound = pygame.mixer.Sound('sounds/powerup.wav')
+        # The Play buttons, one per difficulty, and their labels are made
+        # the first time they are needed; headless games never need them.
+        self.button_text = None
+        self.play_buttons = {}
+        self.startup.stage('game objects')
 
         # Initialize powerups group
         self.powerups = pygame.sprite.Group() 
 
+        # Everything random in a game comes from one seeded generator, and the
+        # input of each step is recorded, so a game can be replayed exactly.
+        self.random = random.Random()
+        self.seed = None
+        self.recorder = Recorder(self, self.settings.replay_dir)
+        # The last few seconds of play, for Backspace to go back to.
+        self.rewind = Rewind(self, self.settings.rewind_interval,
+            self.settings.rewind_seconds)
+
         # Initialize power up states and timers
         self.powerup_active = False
         self.powerup_start_time = 0
@@ -73,71 +158,235 @@ class AlienInvasion:
 
     def run_game(self):
         """Start the main loop for the game."""
+        profiler = self.profiler
+        first_frame = True
+        self._resume()
         while True:
+            frame_time = self.clock.tick(self.settings.max_fps) / 1000
+            profiler.begin_frame()
             self._check_events()
-
+            if self.net:
+                self.net.receive()
+            profiler.mark(EVENTS)
+
+            for _ in range(self.timestep.advance(frame_time)):
+                start = perf_counter_ns()
+                if self.stats.game_active:
+                    if self.controls.polled:
+                        self._poll_controls()
+                    self._update_game(self.timestep.dt)
+                if self.net:
+                    self.net.stepped(perf_counter_ns() - start)
+            self.rewind.update()
+
+            self._update_screen(self.timestep.alpha)
+            profiler.mark(SCREEN)
+            self.renderer.present()
+            self.controls.presented()
+            if self.capture:
+                self.capture.frame()
+            profiler.mark(FLIP)
+            profiler.end_frame()
+
+            if first_frame:
+                first_frame = False
+                self.startup.stage('first frame')
+                print(self.startup.report())
+
+            # Achieved frame rate while playing, per difficulty.
             if self.stats.game_active:
-                self.ship.update()
-                self._update_bullets()
-                self._update_aliens()
-                self._update_powerups()
-                self._update_powerup_timer()
-                
-            self._update_screen() 
+                rate = self.frame_rates.setdefault(self.settings.difficulty,
+                    [0, 0.0])
+                rate[0] += 1
+                rate[1] += frame_time
+
+    def _update_game(self, dt):
+        """Advance the game by one fixed step of dt seconds."""
+        self.recorder.record_step(self.ship.moving_left, self.ship.moving_right)
+        self.timestep.ticks += 1
+        self.state.update(self.timestep.ticks)
+        if not self.state.playing:
+            # Paused: time moves on, nothing else does.
+            return
+
+        self.controls.stepped()
+        mark = self.profiler.mark
+        self.ship.update(dt)
+        if self.partner:
+            self.partner.update(dt)
+        mark(SHIP)
+        self._update_bullets(dt)
+        mark(BULLETS)
+        self._update_aliens(dt)
+        mark(ALIENS)
+        self._update_powerups()
+        self._update_powerup_timer()
+        mark(POWERUPS)
+
+    def step(self, actions=()):
+        """Advance the game by one fixed step without touching the event queue.
+
+        actions is a collection holding any of 'left', 'right' and 'fire'.
+        Returns True while the game is still active.
+        """
+        if 'fire' in actions:
+            self._fire_bullet()
+        self.ship.moving_left = 'left' in actions
+        self.ship.moving_right = 'right' in actions
+
+        if self.stats.game_active:
+            self._update_game(self.timestep.dt)
+        return self.stats.game_active
+
+    def new_game(self, difficulty='normal', seed=None):
+        """Reset the settings for difficulty and start a new game."""
+        self.settings.initialize_dynamic_settings(difficulty)
+        self._start_game(seed)
+
+    def _pause(self, state, seconds):
+        """Enter a timed state; the game picks up again after seconds."""
+        self.state.enter(state, self.timestep.ticks,
+            self.timestep.seconds_to_ticks(seconds))
     
     def _check_events(self):
         """Respond to keypresses and mouse events."""
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                try:                                                            
-                    with open('files/high_score.txt', 'w') as file_object:
-                        # print(f"Writing high score: {self.stats.high_score}")   # NOTE: debug print
-                        file_object.write(str(self.stats.high_score))
-                except Exception as e:
-                    print(f"Error writing high score: {e}")                     # NOTE: catch and print errors, debugging
-                sys.exit()
+                self._quit()
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_pos = pygame.mouse.get_pos()
-                self._check_play_button(mouse_pos)
+                # The event's position is in logical screen coordinates,
+                # however the presenter scales the window.
+                self._check_play_button(event.pos)
             elif event.type == pygame.KEYDOWN:
                 self._check_keydown_events(event)
             elif event.type == pygame.KEYUP:
                 self._check_keyup_events(event)
 
-    def _start_game(self):
-        """Handles start game state."""
+    def _quit(self):
+        """Save the score of a game in progress, report on the session and exit."""
+        if self.stats.game_active:
+            if self.settings.save_path:
+                # The score goes on the leaderboard when the resumed game ends.
+                size, seconds = save_game(self, self.settings.save_path)
+                print(f"Saved game to {self.settings.save_path}: "
+                    f"{size:,} bytes in {seconds * 1000:.1f} ms")
+            else:
+                self.stats.save_score()
+            self.recorder.finish()
+        self.leaderboard.close()
+        print(self.renderer.report())
+        print(self.presenter.report())
+        print(self.controls.report())
+        print(self.rewind.report())
+        if self.capture:
+            self._toggle_capture()
+        print(self.audio.report())
+        for difficulty, (frames, seconds) in self.frame_rates.items():
+            if seconds:
+                print(f"{difficulty}: {frames:,} frames, "
+                    f"{frames / seconds:.1f} fps average")
+        if self.profiler.count and self.settings.profile_export:
+            self.profiler.export(self.settings.profile_export)
+        sys.exit()
+
+    def _resume(self):
+        """Pick up the game saved on quit, if there is one, after a pause."""
+        path = self.settings.save_path
+        if not path or not os.path.exists(path):
+            return
+        try:
+            size, seconds = load_game(self, path)
+        except (OSError, ValueError) as error:
+            print(f"Couldn't resume {path}: {error}")
+            self.stats.game_active = False
+            self.state.enter(GAME_OVER)
+        else:
+            print(f"Resumed game from {path}: {size:,} bytes, "
+                f"loaded in {seconds * 1000:.1f} ms")
+            if self.stats.game_active:
+                pygame.mouse.set_visible(False)
+                if self.state.playing:
+                    self._pause(RESPAWN_PAUSE, self.settings.respawn_pause)
+        os.remove(path)
+
+    def _start_game(self, seed=None):
+        """Handles start game state.
+
+        The game's random numbers come from seed, or a fresh seed if None.
+        """
+        self.seed = random.getrandbits(32) if seed is None else seed
+        self.random.seed(self.seed)
+        self.timestep.ticks = 0
+        self.recorder.start(self.seed)
+        self.rewind.clear()
+
         # Reset the game statistics.
         self.stats.reset_stats()
         self.stats.game_active = True
+        self.state.enter(PLAYING)
         self.sb.prep_score()
         self.sb.prep_level()
         self.sb.prep_ships()
 
         # Get rid of any remaining aliens and bullets.
-        self.aliens.empty()
+        self._prepare_difficulty()
         self.bullets.empty()
 
+        # Clear out any power up left from the last game.
+        self.powerups.empty()
+        self.powerup_active = False
+        self.powerup_counter = 0
+        self.powerup_spawned_this_level = False
+
         # Create a new fleet and center the ship.
         self._create_fleet()
+        self._center_ships()
+
+    def _prepare_difficulty(self):
+        """Size the aliens and the bullet pool for the difficulty.
+
+        Some difficulties (swarm) use smaller aliens and more bullets.
+        Empties the fleet.
+        """
+        alien_size = self.settings.difficulty_profile.alien_size
+        if alien_size:
+            self.aliens.set_sprite(*self.assets.scaled_region(
+                'images/alien.bmp', alien_size))
+        else:
+            self.aliens.set_sprite(*self.assets.region('images/alien.bmp'))
+        self.bullets.reserve(self.settings.max_bullets())
+
+    def _center_ships(self):
+        """Put the ship, and the partner's if there is one, back at the start."""
         self.ship.center_ship()
+        if self.partner:
+            self.partner.center_ship(self.settings.partner_offset)
+
+    def _prep_buttons(self):
+        """Make the Play buttons the first time they are needed."""
+        if self.button_text is not None:
+            return
+        # Button labels are drawn in black on a clear background, so one
+        # atlas serves every button color.
+        profiles = self.settings.difficulties.profiles
+        self.button_text = GlyphAtlas(self.assets.font(None, 48), (0, 0, 0),
+            glyphs='', labels=[profile.label for profile in profiles.values()])
+        for row, (name, profile) in enumerate(profiles.items()):
+            self.play_buttons[name] = Button(self, profile.label,
+                profile.button_color, 60 * row)
 
     def _check_play_button(self, mouse_pos):
         """Start a new game when the player clicks Play."""
-        button_clicked = self.normal_button.rect.collidepoint(mouse_pos)
-        hard_button_clicked = self.hard_button.rect.collidepoint(mouse_pos)
-        nightmare_button_clicked = self.nightmare_button.rect.collidepoint(mouse_pos)
-        p_pressed = pygame.key.get_pressed() 
-        if button_clicked and not self.stats.game_active:
+        self._prep_buttons()
+        if self.stats.game_active:
+            clicked = None
+        else:
+            clicked = next((name for name, button in self.play_buttons.items()
+                if button.rect.collidepoint(mouse_pos)), None)
+        if clicked:
             # Reset the game settings.
-            self.settings.initialize_dynamic_settings()
-            self._start_game()
-        elif hard_button_clicked and not self.stats.game_active:
-            self.settings.initialize_hard_dynamic_settings()
-            self._start_game()
-        elif nightmare_button_clicked and not self.stats.game_active:
-            self.settings.initialize_nightmare_dynamic_settings()
-            self._start_game()
-        elif p_pressed[pygame.K_p] and not self.stats.game_active: 
+            self.new_game(clicked)
+        elif not self.stats.game_active and pygame.key.get_pressed()[pygame.K_p]:
             self._start_game()
 
         # Hide the mouse cursor.
@@ -145,72 +394,130 @@ class AlienInvasion:
             
     def _check_keydown_events(self, event):
         """Responds to keypresses."""
+        if self.controls.owns(event.key):
+            # Polled input reads this key before each step instead.
+            return
         if event.key == pygame.K_RIGHT:
+            self.controls.stamp()
             self.ship.moving_right = True
         elif event.key == pygame.K_LEFT:
+            self.controls.stamp()
             self.ship.moving_left = True
         elif event.key == pygame.K_q:
-            try:                                                            
-                with open('files/high_score.txt', 'w') as file_object:
-                    # print(f"Writing high score: {self.stats.high_score}")   # NOTE: debug print
-                    file_object.write(str(self.stats.high_score))
-            except Exception as e:
-                    print(f"Error writing high score: {e}")   
-            sys.exit()
+            self._quit()
         elif event.key == pygame.K_p:
             self._start_game()
         elif event.key == pygame.K_SPACE:
+            self.controls.stamp()
             self._fire_bullet()
+        elif event.key == pygame.K_F3:
+            self.profiler.set_enabled(not self.profiler.enabled)
+        elif event.key == pygame.K_F9:
+            self._toggle_capture()
+        elif event.key == pygame.K_BACKSPACE and self.stats.game_active:
+            self.rewind.back()
 
     def _check_keyup_events(self, event):
         """Responds to key releases."""
+        if self.controls.owns(event.key):
+            return
         if event.key == pygame.K_RIGHT:
+            self.controls.stamp()
             self.ship.moving_right = False
         elif event.key == pygame.K_LEFT:
+            self.controls.stamp()
             self.ship.moving_left = False
 
-    def _fire_bullet(self):
-        """Create a new bullet and add it to the bullets group."""
-        if len(self.bullets) < self.settings.bullets_allowed:
+    def _toggle_capture(self):
+        """Start recording presented frames, or stop and report on it."""
+        if self.capture:
+            self.capture.close()
+            print(self.capture.report())
+            self.capture = None
+        else:
+            settings = self.settings
+            self.capture = FrameCapture(self.screen, settings.capture_dir,
+                settings.capture_every, settings.capture_slots,
+                settings.capture_format, settings.max_fps or 60)
+            print(f"capture: recording to {self.capture.path}")
+
+    def _poll_controls(self):
+        """Steer and fire from the keyboard as it is right now."""
+        left, right, fire = self.controls.poll()
+        self.ship.moving_left = left
+        self.ship.moving_right = right
+        if fire:
+            self._fire_bullet()
+
+    def _fire_bullet(self, ship=None):
+        """Fire a bullet (a volley of them, if the difficulty says so) from
+        the pool, from ship or the player's own ship."""
+        if ship is None:
+            ship = self.ship
+            self.recorder.fire()
+        if not self.state.playing:
+            return
+        if len(self.bullets) < self.settings.max_bullets():
             powerup_active = self.check_if_powerup_active() 
-            new_bullet = Bullet(self, powerup_active)
-            self.bullets.add(new_bullet)
+            if self.settings.difficulty_profile.volley > 1:
+                fired = self._fire_volley(ship, powerup_active)
+            else:
+                fired = self.bullets.fire(ship.rect, powerup_active)
+            if not fired:
+                return
 
             # play ship laser shot sound or powerup sound
             if self.powerup_active:
-                self.powerup_bullet_sound.play()
+                self.audio.play('powerup_laser')
             else:
-                self.ship_laser_sound.play()
+                self.audio.play('laser')
+
+    def _fire_volley(self, ship, powerup_active):
+        """Fire a spread of bullets centred on the ship; return how many."""
+        profile = self.settings.difficulty_profile
+        count = min(profile.volley,
+            self.settings.max_bullets() - len(self.bullets))
+        spacing = profile.volley_spacing
+        first = -(count - 1) * spacing / 2
+        fired = 0
+        for i in range(count):
+            if self.bullets.fire(ship.rect, powerup_active,
+                    round(first + i * spacing)) is not None:
+                fired += 1
+        return fired
 
     def check_if_powerup_active(self) :
         """Check if the powerup is active."""
         return self.powerup_active # This could be a boolean attribute you toggle.
 
-    def _update_bullets(self):
+    def _update_bullets(self, dt):
         """Update position of bullets and get rid of old bullets."""
-        # Update bullet positions.
-        self.bullets.update()
-
-        # Get rid of bullets that have disappeared.
-        for bullet in self.bullets.copy():
-                if bullet.rect.bottom <= 0:
-                    self.bullets.remove(bullet)
+        # Update bullet positions and get rid of bullets that have disappeared.
+        self.bullets.update(dt)
 
         self._check_bullet_alien_collisions()
 
     def _check_bullet_alien_collisions(self):
         """Respond to bullet-alien collisions."""
         # Remove any bullets and aliens that have collided.
-        collisions = pygame.sprite.groupcollide(self.bullets, self.aliens, True, True) 
-        # Change self.bullets boolean pair to False for super bullets that rip through everything
+        # Every bullet is tested in one batch.
+        collisions = []
+        bullets = self.bullets.sprites()
+        for index, aliens in self.aliens.collide_rects(
+                [bullet.rect for bullet in bullets]):
+            self.aliens.kill(aliens)
+            self.bullets.kill(bullets[index])
+            collisions.append(aliens)
+        self.bullets.compact()
+        # Leave the bullet alive for super bullets that rip through everything
 
         if collisions:
-            for aliens in collisions.values():
+            for aliens in collisions:
                 self.stats.score += self.settings.alien_points * len(aliens)
             self.sb.prep_score()
             self.sb.check_high_score()
             self.powerup_counter += len(aliens)
-            if self.powerup_counter >= random.randint(3, 15):
+            if self.powerup_counter >= self.random.randint(3, 15):
                 self.powerup_counter = 0
                 self._create_powerup()
 
@@ -221,7 +528,7 @@ class AlienInvasion:
         """Create a power-up and add it to the power-ups group."""
         if not self.powerups and not self.powerup_spawned_this_level: # Make sure only one powerup is present
             powerup = PowerUp(self)
-            powerup.rect.x = random.randint(0, self.settings.screen_width - powerup.rect.width)
+            powerup.rect.x = self.random.randint(0, self.settings.screen_width - powerup.rect.width)
             powerup.rect.y = self.ship.rect.y - powerup.rect.height + 50 # Align with the ships y position. 
             self.powerups.add(powerup)
             self.powerup_spawned_this_level = True
@@ -229,22 +536,24 @@ class AlienInvasion:
     def _update_powerups(self):
         """Update the position of power-ups and get rid of old power-ups."""
         for powerup in self.powerups.copy():        
-            if pygame.sprite.spritecollideany(self.ship, self.powerups):
-                self.powerup_sound.play()
+            if (pygame.sprite.spritecollideany(self.ship, self.powerups) or
+                    self.partner and
+                    pygame.sprite.spritecollideany(self.partner, self.powerups)):
+                self.audio.play('powerup')
                 self._powerup_collected()
                 self.powerups.remove(powerup)
                 # Brief pause
-                sleep(0.5)
+                self._pause(POWERUP_FLASH, self.settings.powerup_pause)
 
     def _powerup_collected(self):
         """Handle powerup collection."""
-        self.powerup_start_time = pygame.time.get_ticks()
+        self.powerup_start_time = self.timestep.time_ms
         self.powerup_active = True
         # TODO: start a timer for the power-up duration
 
     def _update_powerup_timer(self):
         """Update the power up state based on the timer."""
-        if self.powerup_active and pygame.time.get_ticks() - self.powerup_start_time > self.powerup_duration:
+        if self.powerup_active and self.timestep.time_ms - self.powerup_start_time > self.powerup_duration:
             self._end_powerup()
 
     def _end_powerup(self):
@@ -253,29 +562,30 @@ class AlienInvasion:
 
     def _start_new_level(self):
         """starts new level if there are no more aliens"""
-        # Destroy existing bullets and create new fleet.
-        self.bullets.empty()
-        self._create_fleet()
-        self.settings.increase_speed()
-
         # Increase level.
         self.stats.level += 1
         self.sb.prep_level()
 
+        # Destroy existing bullets and create the new level's fleet.
+        self.bullets.empty()
+        self._create_fleet()
+        self.settings.increase_speed()
+
         # Reset powerup flag
         self.powerup_spawned_this_level = False
 
         # Play sound to indicate new level starting
-        self.level_success_sound.play()
+        self.audio.play('level_success')
 
-    def _update_aliens(self):
+    def _update_aliens(self, dt):
         """Check if the fleet is at an edge,
         then update the positions of all aliens in the fleet."""
         self._check_fleet_edges()
-        self.aliens.update()
+        self.aliens.update(dt)
 
         # Look for alien-ship collisions.
-        if pygame.sprite.spritecollideany(self.ship, self.aliens):
+        if len(self.aliens.collide_rect(self.ship.rect)) or (self.partner and
+                len(self.aliens.collide_rect(self.partner.rect))):
             self._ship_hit()
 
         # Look for aliens hitting the bottom of the screen.
@@ -289,7 +599,7 @@ class AlienInvasion:
             self.sb.prep_ships()
 
             # Play ship hit sound
-            self.player_hit_sound.play()
+            self.audio.play('player_hit')
 
             # Get rid of any remaining aliens and bullets.
             self.aliens.empty()
@@ -297,97 +607,107 @@ class AlienInvasion:
 
             # Create a new fleet and center the ship. 
             self._create_fleet()
-            self.ship.center_ship()
+            self._center_ships()
 
             # Pause.
-            sleep(0.5)
+            self._pause(RESPAWN_PAUSE, self.settings.respawn_pause)
         else:
             # Play game over sound
-            self.game_over_sound.play()
+            self.audio.play('game_over')
+
+            # Record the score in the background, and keep the replay.
+            self.stats.save_score()
+            self.recorder.finish()
 
             self.stats.game_active = False
+            self.state.enter(GAME_OVER)
             pygame.mouse.set_visible(True)
 
     def _create_fleet(self):
-        """Create the fleet of aliens."""
-        # Create an alien and find the number of aliens in a row.
-        # Spacing between each alien is equal to one alien width.
-        alien = Alien(self)
-        alien_width, alien_height = alien.rect.size
-        available_space_x = self.settings.screen_width - (2 * alien_width)
-        number_aliens_x = available_space_x // (2 * alien_width)
-
-        # Determine the number of row of aliens that fit on the screen.
-        ship_height = self.ship.rect.height
-        available_space_y = (self.settings.screen_height -
-                             (3 * alien_height) - ship_height)
-        number_rows = available_space_y // (2 * alien_height)
-        
-        # Create the full fleet of aliens.
-        for row_number in range(number_rows):
-            for alien_number in range(number_aliens_x):
-                self._create_alien(alien_number, row_number)
-            
-    def _create_alien(self, alien_number, row_number):
-        """Create an alien and place it in the row."""
-        alien = Alien(self)
-        alien_width, alien_height = alien.rect.size
-        alien.x = alien_width + 2 * alien_width * alien_number
-        alien.rect.x = alien.x
-        alien.rect.y = alien.rect.height + 2 * alien.rect.height * row_number
-        self.aliens.add(alien)
+        """Create the fleet of aliens in the formation for the current level."""
+        name = self.formations.for_level(self.stats.level,
+            self.settings.difficulty)
+        self.aliens.spawn_formation(self._formation(name))
+
+    def _formation(self, name):
+        """Return the formation name compiled for the screen and sprites."""
+        return self.formations.compile(name,
+            (self.settings.screen_width, self.settings.screen_height),
+            (self.aliens.width, self.aliens.height), self.ship.rect.height)
 
     def _check_fleet_edges(self):
         """Respond appropriately if any aliens have reached an edge."""
-        for alien in self.aliens.sprites():
-            if alien.check_edges():
-                self._change_fleet_direction()
-                break
+        if self.aliens.check_edges():
+            self._change_fleet_direction()
     
     def _change_fleet_direction(self):
         """Drop the entire fleet and change the fleet's direction."""
-        for alien in self.aliens.sprites():
-            alien.rect.y += self.settings.fleet_drop_speed
-        self.settings.fleet_direction *= -1
+        self.aliens.drop()
 
     def _check_aliens_bottom(self):
         """Check if any aliens have reached the bottom of the screen."""
         screen_rect = self.screen.get_rect()
-        for alien in self.aliens.sprites():
-            if alien.rect.bottom >= screen_rect.bottom:
-                # Treat this the same as if the ship got hit.
-                self._ship_hit()
-                break
-
-    def _update_screen(self):
-        """Update images on the screen, and flip to the new screen."""
-        # Redraw the screen during each pass through the loop. 
-        # The fill() method always takes one argument: a color.
-        self.screen.fill(self.settings.bg_color)
-        self.ship.blitme()
-        for bullet in self.bullets.sprites():
-            bullet.draw_bullet()
-        self.aliens.draw(self.screen)
+        if self.aliens.check_bottom(screen_rect.bottom):
+            # Treat this the same as if the ship got hit.
+            self._ship_hit()
+
+    def _update_screen(self, alpha=1.0):
+        """Update images on the screen, and flip to the new screen.
+
+        alpha is how far the simulation is between its last two steps, so
+        moving sprites are drawn between their previous and current position.
+        """
+        # Build the frame back to front, then let the renderer decide how
+        # much of the screen to redraw.
+        items = [(self.ship.atlas, self.ship.draw_pos(alpha), self.ship.area)]
+        if self.partner:
+            items.append((self.partner.atlas, self.partner.draw_pos(alpha),
+                self.partner.area))
+        items += self.bullets.draw_items(alpha)
+        items += self.aliens.draw_items(alpha)
 
         # Draw the score information.
-        self.sb.show_score()
+        items += self.sb.draw_items()
 
         # Draw power up
-        self.powerups.draw(self.screen)
+        items += [(powerup.atlas, powerup.rect, powerup.area)
+            for powerup in self.powerups.sprites()]
+
+        # Say why the game is paused.
+        if self.stats.game_active and self.state.message:
+            items += self._pause_banner_items(self.state.message)
+
+        # Draw frame timings over the game.
+        if self.profiler.enabled:
+            items += self._profiler_items()
 
         # Draw the play button if the game is inactive.
         if not self.stats.game_active:
-            self.normal_button.draw_button()
-            self.hard_button.draw_button()
-            self.nightmare_button.draw_button()
+            self._prep_buttons()
+            for button in self.play_buttons.values():
+                items += button.draw_items()
 
         # Make the most recently drawn screen visible.
-        pygame.display.flip()
+        self.renderer.draw(items)
+
+    def _profiler_items(self):
+        """Return draw list items for the profiler overlay."""
+        if self.profiler_overlay is None:
+            self.profiler_overlay = ProfilerOverlay(self.profiler,
+                self.assets.font(None, 24), (30, 30, 30), self.settings.bg_color)
+        return self.profiler_overlay.draw_items(self.clock.get_fps())
+
+    def _pause_banner_items(self, message):
+        """Return draw list items for a message in the middle of the screen."""
+        self._prep_buttons()
+        text_image = self.button_text.render(message)
+        text_rect = text_image.get_rect(center=self.screen.get_rect().center)
+        banner_rect = text_rect.inflate(40, 20)
+        return [(self.settings.pause_banner_color, banner_rect),
+            (text_image, text_rect)]
 
 
 if __name__ == '__main__':
     # Make a game instance, and run the game.
     ai = AlienInvasion()
     ai.run_game()
-
-
@@ -0,0 +1,141 @@
+# Part of Alien Invasion game. Shared cache for images and fonts.
+
+import threading
+
+import pygame
+
+from atlas import TextureAtlas
+
+class AssetCache:
+    """A class to load the texture atlas and each font once and hand out
+    shared copies."""
+
+    def __init__(self, image_dir='images', atlas_dir='files/atlas',
+            target=None):
+        """Initialize an empty cache and its counters.
+
+        Images are converted to target's pixel format, the surface they'll
+        be drawn onto; without one, to the display surface's, if there is one.
+        """
+        self.target = target
+        self.fonts = {}
+        self.hits = 0
+        self.misses = 0
+
+        # Every image in image_dir, packed into one surface.
+        self.image_dir = image_dir
+        self.atlas_dir = atlas_dir
+        self.atlas = None
+        self.atlas_surface = None
+        self.loader = None
+        self.scaled = {}
+
+    def preload(self):
+        """Start loading the texture atlas on a worker thread.
+
+        Only file reads happen off the main thread; the atlas is converted
+        to the display format by region() when it is first used.
+        """
+        self.loader = threading.Thread(target=self._load_atlas,
+            name='atlas-loader', daemon=True)
+        self.loader.start()
+        return self.loader
+
+    def _load_atlas(self):
+        """Load the atlas, rebuilding its cache if the images changed."""
+        self.atlas = TextureAtlas.load(self.image_dir, self.atlas_dir)
+
+    def preload_progress(self):
+        """Return 1.0 once the atlas loader has finished, else 0.0.
+
+        A loader that failed counts as finished: region() loads the atlas
+        again on the main thread, where the error can be seen.
+        """
+        if self.atlas is not None:
+            return 1.0
+        return 0.0 if self.loader and self.loader.is_alive() else 1.0
+
+    def region(self, path):
+        """Return (atlas surface, area Rect) for the image at path.
+
+        Drawing with the area lets every sprite share one source surface.
+        """
+        if self.atlas_surface is None:
+            if self.loader is not None:
+                self.loader.join()
+            if self.atlas is None:
+                self._load_atlas()
+            self.atlas_surface = self._convert(self.atlas.surface, True)
+        self.hits += 1
+        return self.atlas_surface, self.atlas.rects[path]
+
+    def scaled_region(self, path, size):
+        """Return (surface, area) for the image at path scaled to size.
+
+        Each scaled copy is made once from the atlas and cached.
+        """
+        key = (path, tuple(size))
+        surface = self.scaled.get(key)
+        if surface is None:
+            self.misses += 1
+            atlas, area = self.region(path)
+            surface = pygame.transform.smoothscale(atlas.subsurface(area),
+                size)
+            self.scaled[key] = surface
+        else:
+            self.hits += 1
+        return surface, surface.get_rect()
+
+    def font(self, name, size):
+        """Return the system font name at size, creating it on first use."""
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is not None:
+            self.hits += 1
+            return font
+
+        self.misses += 1
+        font = pygame.font.SysFont(name, size)
+        self.fonts[key] = font
+        return font
+
+    def _convert(self, surface, alpha):
+        """Match the surface to the target's format, if there is a target.
+
+        convert_alpha() only knows the display surface, which the texture
+        presenter never opens, so alpha images are converted to an alpha
+        version of the target's format instead.
+        """
+        target = self.target
+        if target is None:
+            if not pygame.display.get_init():
+                return surface
+            target = pygame.display.get_surface()
+            if target is None:
+                return surface
+        if alpha:
+            return surface.convert(pygame.Surface((1, 1), pygame.SRCALPHA,
+                target))
+        return surface.convert(target)
+
+    def invalidate(self, path=None):
+        """Drop the atlas, if path is in it, so it is reloaded on next use.
+
+        With path None the atlas is dropped whatever is in it.
+
+        The atlas is reloaded as a whole, and rebuilt if an image in it
+        changed on disk, so dropping any image in it drops the atlas and
+        every scaled copy. Surfaces already handed out keep the old pixels.
+        """
+        if path is None or self.atlas is None or path in self.atlas.rects:
+            if self.loader is not None:
+                self.loader.join()
+                self.loader = None
+            self.atlas = None
+            self.atlas_surface = None
+            self.scaled.clear()
+
+    def stats(self):
+        """Return the cache counters as a dictionary."""
+        return {'scaled': len(self.scaled), 'fonts': len(self.fonts),
+            'hits': self.hits, 'misses': self.misses}
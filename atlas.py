@@ -0,0 +1,142 @@
+# Part of Alien Invasion game. Pack the images directory into one texture
+# atlas, cached on disk with a JSON index of where each image went.
+#
+# Example: python atlas.py --force
+
+import argparse
+import json
+import os
+import tempfile
+
+import pygame
+
+IMAGE_TYPES = ('.bmp', '.png')
+VERSION = 1
+
+def find_images(directory):
+    """Return the paths of every image in directory, sorted."""
+    return sorted(os.path.join(directory, name).replace(os.sep, '/')
+        for name in os.listdir(directory)
+        if name.lower().endswith(IMAGE_TYPES))
+
+
+def pack(sizes, max_width=1024, padding=1):
+    """Pack {key: (width, height)} onto shelves; return (rects, size).
+
+    Tallest images go first, left to right, starting a new shelf when a row
+    is full. padding pixels are left between neighbours.
+    """
+    width = max([max_width] + [w + padding for w, _ in sizes.values()])
+    rects = {}
+    x = y = shelf_height = used_width = 0
+    for key, (w, h) in sorted(sizes.items(),
+            key=lambda item: (-item[1][1], item[0])):
+        if x + w > width:
+            x, y, shelf_height = 0, y + shelf_height + padding, 0
+        rects[key] = pygame.Rect(x, y, w, h)
+        used_width = max(used_width, x + w)
+        x += w + padding
+        shelf_height = max(shelf_height, h)
+    return rects, (max(1, used_width), max(1, y + shelf_height))
+
+
+def _temp_path(directory, suffix):
+    """Create an empty file in directory with suffix and return its path."""
+    descriptor, path = tempfile.mkstemp(suffix, 'tmp-', directory)
+    os.close(descriptor)
+    return path
+
+
+class TextureAtlas:
+    """A class to hold every game image on one surface, by sub-rect.
+
+    The atlas is an alpha surface, so opaque and transparent images can be
+    drawn from the same source with Surface.blits(); each sprite keeps the
+    area of its image.
+    """
+
+    def __init__(self, surface, rects, rebuilt=False):
+        """Wrap surface, where rects maps each image path to its area."""
+        self.surface = surface
+        self.rects = rects
+        self.rebuilt = rebuilt
+
+    @classmethod
+    def load(cls, directory='images', cache_dir='files/atlas', force=False):
+        """Return the atlas for directory, rebuilding the cache if stale.
+
+        The cache is stale when an image was added, removed or modified
+        since it was built, going by file modification times.
+        """
+        paths = find_images(directory)
+        stamps = {path: os.stat(path).st_mtime_ns for path in paths}
+        image_path = os.path.join(cache_dir, 'atlas.png')
+        index_path = os.path.join(cache_dir, 'atlas.json')
+        if not force:
+            try:
+                with open(index_path) as file_object:
+                    index = json.load(file_object)
+                if index['version'] == VERSION and index['sources'] == stamps:
+                    rects = {path: pygame.Rect(rect)
+                        for path, rect in index['rects'].items()}
+                    return cls(pygame.image.load(image_path), rects)
+            except (FileNotFoundError, ValueError, KeyError, pygame.error):
+                pass
+        return cls.build(paths, stamps, image_path, index_path)
+
+    @classmethod
+    def build(cls, paths, stamps, image_path, index_path):
+        """Pack the images in paths, save the atlas and index, and return it."""
+        images = {path: pygame.image.load(path) for path in paths}
+        rects, size = pack({path: image.get_size()
+            for path, image in images.items()})
+
+        # Copy each image in exactly: transparent ones by taking the max
+        # with the empty atlas, opaque ones as they are with full alpha.
+        surface = pygame.Surface(size, pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 0))
+        for path, image in images.items():
+            if image.get_flags() & pygame.SRCALPHA:
+                surface.blit(image, rects[path],
+                    special_flags=pygame.BLEND_RGBA_MAX)
+            else:
+                surface.blit(image, rects[path])
+
+        # Write each file beside its final name and move it into place,
+        # image first, so another process loading the cache never sees a
+        # half-written file or an index ahead of its image.
+        cache_dir = os.path.dirname(image_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_image = _temp_path(cache_dir, '.png')
+        pygame.image.save(surface, temp_image)
+        os.replace(temp_image, image_path)
+        temp_index = _temp_path(cache_dir, '.json')
+        with open(temp_index, 'w') as file_object:
+            json.dump({'version': VERSION, 'sources': stamps,
+                'size': list(size),
+                'rects': {path: list(rect) for path, rect in rects.items()}},
+                file_object, indent=2)
+        os.replace(temp_index, index_path)
+        return cls(surface, rects, rebuilt=True)
+
+
+def main():
+    """Build the atlas (if it is stale) and describe it."""
+    parser = argparse.ArgumentParser(
+        description='Pack the game images into a texture atlas.')
+    parser.add_argument('--directory', default='images')
+    parser.add_argument('--cache-dir', default='files/atlas')
+    parser.add_argument('--force', action='store_true',
+        help='rebuild even if the cached atlas is up to date')
+    args = parser.parse_args()
+
+    atlas = TextureAtlas.load(args.directory, args.cache_dir, args.force)
+    width, height = atlas.surface.get_size()
+    print(f"{'Built' if atlas.rebuilt else 'Up to date'}: "
+        f"{len(atlas.rects)} images in {width}x{height}")
+    for path, rect in atlas.rects.items():
+        print(f"  {path}: {tuple(rect)}")
+
+
+if __name__ == '__main__':
+    main()
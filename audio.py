@@ -0,0 +1,147 @@
+# Part of Alien Invasion game. Sound effects on reserved mixer channels.
+
+import threading
+
+import pygame
+
+WEAPON, IMPACT, UI = 'weapon', 'impact', 'ui'
+
+# Every sound the game plays: name -> (file, category).
+SOUNDS = {
+    'laser': ('sounds/LaserGun.wav', WEAPON),
+    'powerup_laser': ('sounds/blaster.wav', WEAPON),
+    'player_hit': ('sounds/player_hit.wav', IMPACT),
+    'powerup': ('sounds/powerup.wav', IMPACT),
+    'level_success': ('sounds/success.wav', UI),
+    'game_over': ('sounds/game_over.wav', UI),
+}
+
+def pre_init(settings):
+    """Ask for a small mixer buffer; must run before pygame.init()."""
+    pygame.mixer.pre_init(settings.audio_frequency, -16, 2,
+        settings.audio_buffer)
+
+
+class NullAudio:
+    """A stand-in for AudioManager that plays nothing, for headless runs."""
+
+    def play(self, name):
+        """Do nothing, like a sound on a muted mixer."""
+        return None
+
+    def wait_loaded(self, timeout=None):
+        """Nothing to load."""
+        return True
+
+    def progress(self):
+        """Nothing to load."""
+        return 1.0
+
+    def report(self):
+        """Return a one-line summary."""
+        return "audio: off"
+
+
+class AudioManager:
+    """A class to play the game's sounds without shots starving each other.
+
+    Each category gets its own reserved channels, so a burst of laser shots
+    can never take the channel the game over sound needs. When a category's
+    channels are all busy, the one that started longest ago is cut off, and
+    one sound can't restart more often than min_interval_ms. Sounds load on
+    a background thread; one played before it gets there loads on the spot.
+    """
+
+    def __init__(self, settings, sounds=SOUNDS):
+        """Open the mixer, reserve the channels and start loading sounds."""
+        self.sounds = sounds
+        self.min_interval = settings.sound_min_interval_ms
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+
+        # Reserved channels are never handed out by Sound.play(), so each
+        # category only ever plays on its own.
+        total = sum(settings.audio_channels.values())
+        pygame.mixer.set_num_channels(total)
+        pygame.mixer.set_reserved(total)
+        self.channels = {}
+        first = 0
+        for category, count in settings.audio_channels.items():
+            self.channels[category] = [pygame.mixer.Channel(i)
+                for i in range(first, first + count)]
+            first += count
+        self.started = {channel: 0 for channels in self.channels.values()
+            for channel in channels}
+        self.last_played = {}
+        self.played = self.stolen = self.limited = 0
+
+        self.loaded = {}
+        self.failed = set()
+        self.lock = threading.Lock()
+        self.loader = threading.Thread(target=self._load_all,
+            name='sound-loader', daemon=True)
+        self.loader.start()
+
+    def _load(self, name):
+        """Return the Sound for name, loading it if nobody has yet.
+
+        A sound that can't be loaded is reported once and left out, so the
+        game plays on without it and progress() still reaches 1. Returns
+        None for such a sound.
+        """
+        with self.lock:
+            sound = self.loaded.get(name)
+            if sound is None and name not in self.failed:
+                try:
+                    sound = self.loaded[name] = pygame.mixer.Sound(
+                        self.sounds[name][0])
+                except (pygame.error, OSError) as e:
+                    print(f"No sound {name!r}: {e}")
+                    self.failed.add(name)
+            return sound
+
+    def _load_all(self):
+        """Load every sound in the background."""
+        for name in self.sounds:
+            self._load(name)
+
+    def wait_loaded(self, timeout=None):
+        """Wait for the background loader; return True once it is done."""
+        self.loader.join(timeout)
+        return not self.loader.is_alive()
+
+    def progress(self):
+        """Return the fraction of sounds loaded so far."""
+        return (len(self.loaded) + len(self.failed)) / len(self.sounds)
+
+    def play(self, name):
+        """Play the sound name on a channel of its category."""
+        now = pygame.time.get_ticks()
+        last = self.last_played.get(name)
+        if last is not None and now - last < self.min_interval:
+            self.limited += 1
+            return None
+        self.last_played[name] = now
+
+        sound = self.loaded.get(name) or self._load(name)
+        if sound is None:
+            return None
+        channels = self.channels[self.sounds[name][1]]
+        for channel in channels:
+            if not channel.get_busy():
+                break
+        else:
+            channel = min(channels, key=self.started.get)
+            self.stolen += 1
+        self.started[channel] = now
+        channel.play(sound)
+        self.played += 1
+        return channel
+
+    def report(self):
+        """Return a one-line summary of the session's sound playback."""
+        line = (f"audio: {self.played:,} sounds played, {self.stolen:,} "
+            f"channels stolen, {self.limited:,} rate-limited")
+        if self.failed:
+            line += f", {len(self.failed):,} failed to load"
+        return line
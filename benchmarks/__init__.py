@@ -0,0 +1,4 @@
+"""Headless performance benchmarks for Alien Invasion.
+
+Run from the project directory with ``python -m benchmarks``.
+"""
@@ -0,0 +1,143 @@
+# Part of Alien Invasion game. Run the benchmarks and check for regressions.
+#
+# Example: python -m benchmarks --save-baseline, then after a change,
+# python -m benchmarks --compare
+#
+# The baseline is only meaningful on the machine that made it, so it isn't
+# kept in the repository.
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tracemalloc
+from time import perf_counter
+
+# The report goes to stdout, so keep pygame's banner out of it.
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+import pygame
+
+from alien_invasion import AlienInvasion
+from profiler import PHASES
+from benchmarks.scenarios import SCENARIOS
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+def run_scenario(name, seed, scale=1.0):
+    """Warm up and time one scenario, then rerun it briefly to measure peak
+    memory."""
+    setup, iterations = SCENARIOS[name]
+    iterations = max(1, int(iterations * scale))
+
+    random.seed(seed)
+    ai_game = AlienInvasion(headless=True)
+    run = setup(ai_game)
+    for _ in range(max(1, iterations // 10)):
+        run()
+
+    profiler = ai_game.profiler
+    profiler.set_enabled(True)
+    start = perf_counter()
+    for _ in range(iterations):
+        profiler.begin_frame()
+        run()
+        profiler.end_frame()
+    seconds = perf_counter() - start
+    phases = {phase: round(mean, 4) for phase, mean in
+        zip(PHASES, profiler.phase_means()) if mean}
+
+    # tracemalloc slows everything down, so memory gets its own short run.
+    random.seed(seed)
+    ai_game = AlienInvasion(headless=True)
+    tracemalloc.start()
+    run = setup(ai_game)
+    for _ in range(max(1, iterations // 10)):
+        run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    result = {'iterations': iterations, 'seconds': round(seconds, 4),
+        'per_second': round(iterations / seconds, 1)}
+    # Scenarios that take no profiler marks have no phases to report.
+    if phases:
+        result['phases_ms'] = phases
+    result['peak_kib'] = round(peak / 1024, 1)
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions against the baseline results."""
+    failures = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        slowest = expected['per_second'] * (1 - tolerance)
+        if result['per_second'] < slowest:
+            failures.append(f"{name}: {result['per_second']:,.1f}/s is below "
+                f"{slowest:,.1f}/s (baseline {expected['per_second']:,.1f}/s)")
+        largest = expected['peak_kib'] * (1 + tolerance)
+        if result['peak_kib'] > largest:
+            failures.append(f"{name}: peak {result['peak_kib']:,.1f} KiB is "
+                f"above {largest:,.1f} KiB (baseline {expected['peak_kib']:,.1f} KiB)")
+    return failures
+
+
+def main():
+    """Run the selected scenarios, print JSON and check the baseline."""
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+        description='Run Alien Invasion performance benchmarks headlessly.')
+    parser.add_argument('scenarios', nargs='*',
+        help=f"scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--scale', type=float, default=1.0,
+        help='multiply every scenario\'s iteration count')
+    parser.add_argument('--output', help='also write the results JSON here')
+    parser.add_argument('--save-baseline', action='store_true',
+        help=f'also write the results JSON to {BASELINE}, to compare later '
+            'runs on this machine against')
+    parser.add_argument('--compare', metavar='BASELINE', nargs='?',
+        const=BASELINE, help='fail if results regress against this baseline '
+            f'JSON (default {BASELINE})')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+        help='allowed fractional slowdown or memory growth (default 0.25)')
+    args = parser.parse_args()
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+    # Read the baseline first, so a missing one doesn't waste a run.
+    if args.compare:
+        try:
+            with open(args.compare) as file_object:
+                baseline = json.load(file_object)['scenarios']
+        except FileNotFoundError:
+            parser.error(f"no baseline at {args.compare}; make one on this "
+                "machine with --save-baseline first")
+    results = {name: run_scenario(name, args.seed, args.scale)
+        for name in names}
+    report = {'python': platform.python_version(),
+        'pygame': pygame.version.ver, 'machine': platform.machine(),
+        'seed': args.seed, 'scenarios': results}
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    for path in (args.output, args.save_baseline and BASELINE):
+        if path:
+            with open(path, 'w') as file_object:
+                file_object.write(text + '\n')
+
+    if args.compare:
+        failures = compare(results, baseline, args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%}.", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+# Part of Alien Invasion game. Scripted benchmark scenarios.
+#
+# Each scenario sets up a headless game and returns a function that runs one
+# iteration of the workload being measured.
+
+from presenter import TexturePresenter
+from profiler import SCREEN, FLIP
+from renderer import FullRenderer
+
+SCENARIOS = {}
+
+def scenario(iterations):
+    """Register a scenario that runs for iterations iterations."""
+    def register(setup):
+        SCENARIOS[setup.__name__] = (setup, iterations)
+        return setup
+    return register
+
+
+def _nightmare_level_20(ai_game):
+    """Start a nightmare game and speed it up to level 20."""
+    ai_game.new_game('nightmare')
+    for level in range(19):
+        ai_game.settings.increase_speed()
+    ai_game.stats.level = 20
+
+
+def _play(ai_game, difficulty, actions):
+    """Return an iteration that steps the game, restarting it at game over."""
+    def run():
+        if not ai_game.step(actions):
+            ai_game.new_game(difficulty)
+    return run
+
+
+@scenario(iterations=2000)
+def create_fleet_level_1(ai_game):
+    """Rebuild the level 1 fleet from scratch."""
+    ai_game.new_game('normal')
+    def run():
+        ai_game.aliens.empty()
+        ai_game._create_fleet()
+    return run
+
+
+@scenario(iterations=2000)
+def create_fleet_nightmare_20(ai_game):
+    """Rebuild the fleet at nightmare level 20."""
+    _nightmare_level_20(ai_game)
+    def run():
+        ai_game.aliens.empty()
+        ai_game._create_fleet()
+    return run
+
+
+@scenario(iterations=20000)
+def play_nightmare_20(ai_game):
+    """Step a nightmare level 20 game while firing and moving."""
+    _nightmare_level_20(ai_game)
+    return _play(ai_game, 'nightmare', ('right', 'fire'))
+
+
+@scenario(iterations=20000)
+def max_bullets(ai_game):
+    """Step a game with the ship firing as many bullets as allowed."""
+    ai_game.settings.bullets_allowed = 200
+    ai_game.new_game('normal')
+    return _play(ai_game, 'normal', ('fire',))
+
+
+@scenario(iterations=500)
+def start_new_level(ai_game):
+    """Clear the fleet and start the next level, over and over."""
+    ai_game.new_game('normal')
+    def run():
+        ai_game._start_new_level()
+    return run
+
+
+@scenario(iterations=1000)
+def menu_idle(ai_game):
+    """Draw and present the menu with no game running."""
+    profiler = ai_game.profiler
+    def run():
+        ai_game._update_screen()
+        profiler.mark(SCREEN)
+        ai_game.renderer.present()
+        profiler.mark(FLIP)
+    return run
+
+
+@scenario(iterations=1000)
+def swarm_frame(ai_game):
+    """Play, draw and present whole frames of a swarm game; per_second is
+    the frame rate a machine reaches."""
+    ai_game.new_game('swarm')
+    steps = ai_game.settings.tick_rate // ai_game.settings.max_fps
+    actions = (('left', 'fire'), ('right', 'fire'))
+    profiler = ai_game.profiler
+    frame = 0
+    def run():
+        nonlocal frame
+        frame += 1
+        for _ in range(steps):
+            if not ai_game.step(actions[frame // 120 % 2]):
+                ai_game.new_game('swarm')
+        ai_game._update_screen()
+        profiler.mark(SCREEN)
+        ai_game.renderer.present()
+        profiler.mark(FLIP)
+    return run
+
+
+@scenario(iterations=500)
+def texture_present(ai_game):
+    """Draw a frame at the logical size and present it scaled up to a
+    double-size window through the texture presenter."""
+    settings = ai_game.settings
+    size = (settings.screen_width, settings.screen_height)
+    presenter = TexturePresenter(size, "benchmark",
+        window_size=(2 * size[0], 2 * size[1]))
+    ai_game.screen = presenter.screen
+    ai_game.renderer = FullRenderer(presenter, settings.bg_color)
+    ai_game.new_game('normal')
+    profiler = ai_game.profiler
+    def run():
+        ai_game.step(('fire',))
+        ai_game._update_screen()
+        profiler.mark(SCREEN)
+        ai_game.renderer.present()
+        profiler.mark(FLIP)
+    return run
@@ -1,43 +1,156 @@
-# Part of Alien Invasion game. The bullet class.
+# Part of Alien Invasion game. The bullet class, and the pool bullets live in.
 
 import pygame
-from pygame.sprite import Sprite
 
-class Bullet(Sprite):
-	"""A class to manage bullets fired from the ship"""
+from timestep import lerp
 
-	def __init__(self, ai_game, powerup_active=False):
-		"""Create a bullet object at the ship's current position."""
-		super().__init__()
-		self.screen = ai_game.screen
+class Bullet:
+	"""A class to manage bullets fired from the ship.
+
+	Bullets are small records that a BulletPool hands out and takes back,
+	so firing never allocates a new object or Rect.
+	"""
+
+	__slots__ = ('settings', 'color', 'rect', 'frame_rect', 'y',
+		'prev_y', 'speed', 'alive', 'image', 'powerup')
+
+	def __init__(self, ai_game):
+		"""Create a spare bullet; reset() puts it at the ship."""
 		self.settings = ai_game.settings
 		self.color = self.settings.bullet_color
-
-		# Create a bullet rect at (0, 0) and then set correct position. 
 		self.rect = pygame.Rect(0, 0, self.settings.bullet_width,
 			self.settings.bullet_height)
-		self.rect.midtop = ai_game.ship.rect.midtop
-
-		# Store the bullet's position as a decimal value.
-		self.y = float(self.rect.y)
+		self.frame_rect = pygame.Rect(self.rect)
+		self.y = self.prev_y = 0.0
+		self.speed = self.settings.bullet_speed
+		self.alive = False
+		self.image = None
+		self.powerup = False
 
+	def reset(self, ship_rect, powerup_active=False, offset=0):
+		"""Place the bullet at the ship's current position, offset pixels
+		to the right of its centre."""
+		self.powerup = powerup_active
 		if powerup_active:
 			self.color = self.settings.powerup_bullet_color
-			self.rect.width = self.settings.powerup_bullet_width
-			self.rect.height = self.settings.powerup_bullet_height
-			self.speed = self.settings.powerup_bullet_speed
+			self.rect.size = (self.settings.powerup_bullet_width,
+				self.settings.powerup_bullet_height)
+			self.speed = (self.settings.powerup_bullet_speed_factor *
+				self.settings.bullet_speed)
 		else:
+			self.color = self.settings.bullet_color
+			self.rect.size = (self.settings.bullet_width,
+				self.settings.bullet_height)
 			self.speed = self.settings.bullet_speed
+		self.rect.midtop = (ship_rect.centerx + offset, ship_rect.top)
+
+		# Store the bullet's position as a decimal value, and the value from
+		# the previous step for drawing between steps.
+		self.y = self.prev_y = float(self.rect.y)
+		self.alive = True
+
+	def draw_rect(self, alpha=1.0):
+		"""Return the rect to draw between the bullet's last two steps.
+
+		The same Rect is reused every frame, so copy it to keep it.
+		"""
+		self.frame_rect.size = self.rect.size
+		self.frame_rect.x = self.rect.x
+		self.frame_rect.y = lerp(self.prev_y, self.y, alpha)
+		return self.frame_rect
+
+
+class BulletPool:
+	"""A class to recycle a fixed set of Bullet records.
+
+	Live bullets are kept in firing order in a list; bullets that leave the
+	screen or hit something go back on the free list, and the live list is
+	compacted in place rather than copied.
+	"""
+
+	def __init__(self, ai_game, capacity):
+		"""Create capacity spare bullets."""
+		self.ai_game = ai_game
+		self.active = []
+		self.free = []
+		self.capacity = 0
+
+		# One filled surface per bullet look, so bullets are drawn in the
+		# same blits() call as everything else.
+		self.images = {}
+		self.reserve(capacity)
+
+	def reserve(self, capacity):
+		"""Make sure the pool holds at least capacity bullets."""
+		while self.capacity < capacity:
+			self.free.append(Bullet(self.ai_game))
+			self.capacity += 1
+
+	def fire(self, ship_rect, powerup_active=False, offset=0):
+		"""Take a spare bullet and fire it from ship_rect, if one is free."""
+		if not self.free:
+			return None
+		bullet = self.free.pop()
+		bullet.reset(ship_rect, powerup_active, offset)
+		bullet.image = self._image(bullet.color, bullet.rect.size)
+		self.active.append(bullet)
+		return bullet
+
+	def _image(self, color, size):
+		"""Return a surface of size filled with color, made once."""
+		image = self.images.get((color, size))
+		if image is None:
+			image = pygame.Surface(size)
+			image.fill(color)
+			self.images[(color, size)] = image
+		return image
+
+	def draw_items(self, alpha=1.0):
+		"""Return draw list items for every bullet in flight."""
+		return [(bullet.image, bullet.draw_rect(alpha))
+			for bullet in self.active]
+
+	def __len__(self):
+		"""Return the number of bullets in flight."""
+		return len(self.active)
+
+	def __iter__(self):
+		"""Iterate over the bullets in flight, oldest first."""
+		return iter(self.active)
+
+	def sprites(self):
+		"""Return the bullets in flight, like Group.sprites()."""
+		return self.active
+
+	def update(self, dt):
+		"""Move every bullet and recycle the ones that left the screen."""
+		for bullet in self.active:
+			bullet.prev_y = bullet.y
+			bullet.y -= bullet.speed * dt
+			bullet.rect.y = bullet.y
+			if bullet.rect.bottom <= 0:
+				bullet.alive = False
+		self.compact()
 
-	def update(self):
-		"""Move the bullet up the screen."""
-		# Update the decimal position of the bullet.
-		self.y -= self.settings.bullet_speed
-		# Update the rect position
-		self.rect.y = self.y 
+	def kill(self, bullet):
+		"""Mark bullet as spent; compact() recycles it."""
+		bullet.alive = False
 
-	def draw_bullet(self):
-		"""Draw the bullet to the screen."""
-		pygame.draw.rect(self.screen, self.color, self.rect)
+	def compact(self):
+		"""Return spent bullets to the free list, keeping the rest in order."""
+		active = self.active
+		keep = 0
+		for bullet in active:
+			if bullet.alive:
+				active[keep] = bullet
+				keep += 1
+			else:
+				self.free.append(bullet)
+		del active[keep:]
 
-		
\ No newline at end of file
+	def empty(self):
+		"""Recycle every bullet in flight."""
+		for bullet in self.active:
+			bullet.alive = False
+		self.free.extend(self.active)
+		self.active.clear()
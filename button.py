@@ -11,8 +11,8 @@ class Button:
 		# Set the dimensions and properties of the button.
 		self.width, self.height = 200, 50
 		self.button_color = button_color
-		self.text_color = (0, 0, 0)
-		self.font = pygame.font.SysFont(None, 48)
+		# Labels come from the game's shared button text atlas.
+		self.text = ai_game.button_text
 
 		# Build the button's rect object and center it.
 		self.rect = pygame.Rect(0, 0, self.width, self.height)
@@ -24,12 +24,11 @@ class Button:
 
 	def _prep_msg(self, msg):
 		"""Turn msg into a rendered image and center text on the button."""
-		self.msg_image = self.font.render(msg, True, self.text_color,
-			self.button_color)
+		self.msg_image = self.text.render(msg)
 		self.msg_image_rect = self.msg_image.get_rect()
 		self.msg_image_rect.center = self.rect.center
 
-	def draw_button(self):
-		"""Draw blank button and then draw message."""
-		self.screen.fill(self.button_color, self.rect)
-		self.screen.blit(self.msg_image, self.msg_image_rect)
\ No newline at end of file
+	def draw_items(self):
+		"""Return draw list items for the button and its message."""
+		return [(self.button_color, self.rect),
+			(self.msg_image, self.msg_image_rect)]
\ No newline at end of file
@@ -0,0 +1,209 @@
+# Part of Alien Invasion game. Records presented frames to disk without
+# holding up the game loop.
+#
+# Encoding a 1200x800 PNG takes tens of milliseconds and pygame holds the
+# GIL while it does, so a writer thread would stall the game just as badly
+# as saving inline. The writer is a separate process instead, and frames
+# reach it through a ring of buffers in shared memory.
+
+import json
+import multiprocessing
+import os
+from datetime import datetime
+from multiprocessing import shared_memory
+from time import perf_counter, perf_counter_ns
+
+import numpy as np
+import pygame
+
+CAPTURE_FORMATS = ('png', 'raw')
+
+def _layout(surface):
+    """Return the byte order of surface's pixels, as an ffmpeg pix_fmt.
+
+    Each byte is named 'r', 'g' or 'b', or '0' for padding: 'bgr0' is the
+    usual little-endian XRGB8888 screen.
+    """
+    names = ['0'] * 4
+    for name, shift in zip('rgb', surface.get_shifts()):
+        names[shift // 8] = name
+    return ''.join(names)
+
+
+def _writer(pipe, name, slots, size, layout, path, fmt, fps):
+    """Encode frames from the shared ring as the pipe hands them over.
+
+    Each message is (slot, frame number); the slot goes back through the
+    pipe as soon as its pixels have been copied out or written. A
+    (None, dropped) message finishes the capture: the sidecar is written
+    and the writer's totals sent back.
+    """
+    width, height = size
+    memory = shared_memory.SharedMemory(name=name)
+    frames = np.ndarray((slots, height, width, 4), np.uint8, buffer=memory.buf)
+    rgb = [layout.index(channel) for channel in 'rgb']
+    raw = open(os.path.join(path, 'capture.raw'), 'wb') if fmt == 'raw' else None
+    written = 0
+    size_bytes = 0
+    encode_seconds = 0.0
+    first = last = None
+    try:
+        while True:
+            slot, number = pipe.recv()
+            if slot is None:
+                dropped = number
+                break
+            start = perf_counter()
+            if raw:
+                raw.write(frames[slot])
+                pipe.send(slot)
+                size_bytes += frames[slot].nbytes
+            else:
+                # Copy the pixels out so the slot can go straight back,
+                # then take as long as the PNG takes.
+                pixels = np.ascontiguousarray(frames[slot][:, :, rgb])
+                pipe.send(slot)
+                filename = os.path.join(path, f"frame_{number:06d}.png")
+                pygame.image.save(pygame.image.frombuffer(pixels, size,
+                    'RGB'), filename)
+                size_bytes += os.path.getsize(filename)
+            encode_seconds += perf_counter() - start
+            written += 1
+            first = number if first is None else first
+            last = number
+    finally:
+        if raw:
+            raw.close()
+        del frames
+        memory.close()
+
+    sidecar = {'format': fmt, 'width': width, 'height': height,
+        'pix_fmt': layout, 'fps': fps, 'frames': written, 'dropped': dropped,
+        'first_frame': first, 'last_frame': last}
+    with open(os.path.join(path, 'capture.json'), 'w') as file_object:
+        json.dump(sidecar, file_object, indent=2)
+    pipe.send((written, size_bytes, encode_seconds))
+    pipe.close()
+
+
+class FrameCapture:
+    """A class to copy presented frames to a writer process.
+
+    The ring holds slots frames. frame() copies the screen into a free slot
+    and hands it to the writer, which returns it once encoded; if every
+    slot is still waiting, the frame is dropped and counted instead, so
+    the game loop only ever pays for one memory copy. Each capture goes in
+    its own timestamped directory under directory: a PNG per frame, named
+    by presented frame number so drops show as gaps, or one raw file of
+    frames in the screen's byte order. capture.json describes either.
+    """
+
+    def __init__(self, screen, directory, every=1, slots=8, fmt='png', fps=60):
+        """Allocate the ring for screen and start the writer process."""
+        if fmt not in CAPTURE_FORMATS:
+            raise ValueError(f"Unknown capture format {fmt!r}")
+        if screen.get_bytesize() != 4:
+            raise ValueError("Frame capture needs a 32-bit screen")
+        self.screen = screen
+        self.every = every
+        self.fmt = fmt
+        width, height = screen.get_size()
+        frame_bytes = screen.get_pitch() * height
+        stamp = os.path.join(directory, datetime.now().strftime('%Y%m%d-%H%M%S'))
+        self.path, count = stamp, 1
+        while os.path.exists(self.path):
+            count += 1
+            self.path = f"{stamp}-{count}"
+        os.makedirs(self.path)
+
+        self.memory = shared_memory.SharedMemory(create=True,
+            size=frame_bytes * slots)
+        self.slots = [self.memory.buf[i * frame_bytes:(i + 1) * frame_bytes]
+            for i in range(slots)]
+        # Touch every page now, not on the first frames captured.
+        blank = bytes(frame_bytes)
+        for slot in self.slots:
+            slot[:] = blank
+        self.free = list(range(slots))
+        context = multiprocessing.get_context('spawn')
+        self.pipe, child = context.Pipe()
+        self.process = context.Process(target=_writer, name='frame-writer',
+            args=(child, self.memory.name, slots, (width, height),
+                _layout(screen), self.path, fmt, fps / every), daemon=True)
+        self.process.start()
+        child.close()
+
+        self.presented = 0
+        self.captured = 0
+        self.dropped = 0
+        self.copy_ns = 0
+        self.copy_max_ns = 0
+        self.totals = None
+
+    def _reclaim(self):
+        """Take back every slot the writer has finished with."""
+        pipe = self.pipe
+        try:
+            while pipe.poll():
+                self.free.append(pipe.recv())
+        except (EOFError, OSError):
+            # The writer has stopped; the slots it held stay taken.
+            pass
+
+    def frame(self):
+        """Capture the frame just presented, if it's due and a slot is free."""
+        self.presented += 1
+        if (self.presented - 1) % self.every:
+            return
+        self._reclaim()
+        if not self.free:
+            self.dropped += 1
+            return
+        start = perf_counter_ns()
+        slot = self.free.pop()
+        self.slots[slot][:] = self.screen.get_buffer()
+        try:
+            self.pipe.send((slot, self.presented))
+        except OSError:
+            self.dropped += 1
+            return
+        elapsed = perf_counter_ns() - start
+        self.captured += 1
+        self.copy_ns += elapsed
+        self.copy_max_ns = max(self.copy_max_ns, elapsed)
+
+    def close(self):
+        """Wait for the writer to finish the frames it has, then stop it."""
+        if self.totals is not None:
+            return
+        self.totals = (0, 0, 0.0)
+        try:
+            self.pipe.send((None, self.dropped))
+            while True:
+                message = self.pipe.recv()
+                if isinstance(message, tuple):
+                    self.totals = message
+                    break
+        except (EOFError, OSError):
+            # The writer died (disk full, say); what it wrote is kept.
+            pass
+        self.pipe.close()
+        self.process.join()
+        for slot in self.slots:
+            slot.release()
+        self.memory.close()
+        self.memory.unlink()
+
+    def report(self):
+        """Return a one-line summary of the capture."""
+        written, size_bytes, encode_seconds = self.totals or (0, 0, 0.0)
+        due = self.captured + self.dropped
+        line = (f"capture: {written:,} of {due:,} frames written to "
+            f"{self.path} ({self.fmt}, {size_bytes / 2**20:,.1f} MiB), "
+            f"{self.dropped:,} dropped")
+        if self.captured:
+            line += (f", copy {self.copy_ns / self.captured / 1e6:.2f} ms "
+                f"mean / {self.copy_max_ns / 1e6:.2f} ms max")
+        if written:
+            line += f", encode {encode_seconds / written * 1000:.1f} ms mean"
+        return line
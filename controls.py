@@ -0,0 +1,133 @@
+# Part of Alien Invasion game. Play controls read from key events or polled
+# before each step, and the time from input to display.
+
+from array import array
+from time import perf_counter_ns
+
+import pygame
+
+EVENTS, POLLED = 'events', 'polled'
+INPUT_MODES = (EVENTS, POLLED)
+
+# Keys that steer and fire the ship.
+PLAY_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_SPACE)
+
+class LatencyHistogram:
+    """A class to count latencies in 1 ms buckets, with one for overflow."""
+
+    def __init__(self, buckets=100):
+        """Allocate buckets buckets, for 0 to buckets milliseconds."""
+        self.buckets = buckets
+        self.counts = array('q', bytes(8 * (buckets + 1)))
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns):
+        """Count one latency of ns nanoseconds."""
+        self.counts[min(ns // 1_000_000, self.buckets)] += 1
+        self.count += 1
+        self.total_ns += ns
+        self.max_ns = max(self.max_ns, ns)
+
+    def percentile(self, fraction):
+        """Return the upper edge, in ms, of the bucket holding fraction."""
+        if not self.count:
+            return 0
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return bucket + 1
+        return self.buckets + 1
+
+    def report(self, title='latency', width=40):
+        """Return a summary line and a bar for every non-empty bucket."""
+        if not self.count:
+            return f"{title}: nothing measured"
+        lines = [f"{title}: {self.count:,} inputs, "
+            f"mean {self.total_ns / self.count / 1e6:.1f} ms, "
+            f"p50 <{self.percentile(0.5)} ms, "
+            f"p95 <{self.percentile(0.95)} ms, "
+            f"p99 <{self.percentile(0.99)} ms, "
+            f"max {self.max_ns / 1e6:.1f} ms"]
+        most = max(self.counts)
+        for bucket, count in enumerate(self.counts):
+            if count:
+                label = (f">={bucket}" if bucket == self.buckets
+                    else f"{bucket}-{bucket + 1}")
+                bar = '#' * max(1, round(width * count / most))
+                lines.append(f"  {label:>7} ms {count:7,} {bar}")
+        return "\n".join(lines)
+
+
+class Controls:
+    """A class to read the play keys and time them to the screen.
+
+    In 'events' mode the game follows KEYDOWN and KEYUP events, drained once
+    a frame. In 'polled' mode poll() reads the whole keyboard right before
+    each simulation step, and space fires as it goes down; the play keys'
+    events are then ignored.
+
+    Every input that changes what the ship does is stamped when the game
+    first sees it. Once a step has simulated it and the frame after that
+    step has been presented, the time from stamp to present goes into the
+    histogram. SDL's own event timestamps aren't available from pygame, so
+    time spent in the event queue before the game looks isn't counted.
+    """
+
+    def __init__(self, ai_game, mode=EVENTS):
+        """Initialize the controls for ai_game in mode."""
+        if mode not in INPUT_MODES:
+            raise ValueError(f"Unknown input mode {mode!r}")
+        self.ai_game = ai_game
+        self.mode = mode
+        self.polled = mode == POLLED
+        self.held = (False, False)
+        self.space_down = False
+
+        # Stamps of inputs not yet simulated, and simulated but not shown.
+        self.pending = []
+        self.simulated = []
+        self.histogram = LatencyHistogram()
+
+    def owns(self, key):
+        """Return True if key is read by poll(), not from its events."""
+        return self.polled and key in PLAY_KEYS
+
+    def stamp(self):
+        """Note an input that changes the ship, if a game is being played."""
+        if self.ai_game.stats.game_active and self.ai_game.state.playing:
+            self.pending.append(perf_counter_ns())
+
+    def poll(self):
+        """Read the keyboard now; return (left, right, fire)."""
+        pygame.event.pump()
+        keys = pygame.key.get_pressed()
+        left, right = keys[pygame.K_LEFT], keys[pygame.K_RIGHT]
+        space = keys[pygame.K_SPACE]
+        fire = space and not self.space_down
+        self.space_down = space
+        if fire or (left, right) != self.held:
+            self.stamp()
+        self.held = (left, right)
+        return left, right, fire
+
+    def stepped(self):
+        """Mark every stamped input as simulated."""
+        if self.pending:
+            self.simulated += self.pending
+            self.pending.clear()
+
+    def presented(self):
+        """Record the latency of every simulated input, now on screen."""
+        if self.simulated:
+            now = perf_counter_ns()
+            for stamp in self.simulated:
+                self.histogram.add(now - stamp)
+            self.simulated.clear()
+
+    def report(self):
+        """Return the latency histogram for the session."""
+        return self.histogram.report(f"input latency ({self.mode})")
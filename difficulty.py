@@ -0,0 +1,83 @@
+# Part of Alien Invasion game. Difficulty profiles read from a data file and
+# compiled into per-level tables.
+
+import json
+import re
+
+# What a level sets, in table column order.
+LEVEL_SETTINGS = ('ship_speed', 'bullet_speed', 'alien_speed',
+    'alien_points', 'fleet_drop_speed')
+
+class DifficultyProfile:
+    """A class to hold one difficulty's settings for every level.
+
+    Each level's speeds are the previous level's times speedup_scale, its
+    alien points the previous level's times score_scale rounded down, and
+    its drop speed the previous level's times drop_scale. The table is
+    built ahead for the first levels and grown if a game gets past them.
+    """
+
+    def __init__(self, name, spec, levels):
+        """Compile levels rows of the table for spec."""
+        self.name = name
+        self.label = spec.get('label', name.title())
+        self.button_color = tuple(spec['button_color'])
+        self.speedup_scale = spec['speedup_scale']
+        self.score_scale = spec['score_scale']
+        self.drop_scale = spec['drop_scale']
+
+        # Fixed for the whole game. None means the Settings default.
+        self.bullets_allowed = spec['bullets_allowed']
+        self.alien_size = spec['alien_size'] and tuple(spec['alien_size'])
+        self.volley = spec['volley']
+        self.volley_spacing = spec['volley_spacing']
+
+        self.table = [tuple(spec[name] for name in LEVEL_SETTINGS)]
+        self._extend(levels)
+
+    def _extend(self, levels):
+        """Add rows until the table has levels of them."""
+        table = self.table
+        while len(table) < levels:
+            ship, bullet, alien, points, drop = table[-1]
+            scale = self.speedup_scale
+            table.append((ship * scale, bullet * scale, alien * scale,
+                int(points * self.score_scale), drop * self.drop_scale))
+
+    def level(self, index):
+        """Return the row of LEVEL_SETTINGS for level index + 1."""
+        if index >= len(self.table):
+            self._extend(index + 1)
+        return self.table[index]
+
+
+class DifficultyBook:
+    """A class to load every difficulty profile, in menu order."""
+
+    def __init__(self, path='files/difficulties.json'):
+        """Read the profiles from path and compile their level tables."""
+        with open(path) as file_object:
+            data = json.load(file_object)
+        defaults = data.get('defaults', {})
+        self.profiles = {}
+        for name, spec in data['difficulties'].items():
+            # Names become leaderboard table names.
+            if not re.fullmatch(r'[a-z_]+', name):
+                raise ValueError(f"Bad difficulty name: {name!r}")
+            spec = {**defaults, **spec}
+            missing = [key for key in LEVEL_SETTINGS if key not in spec]
+            if missing:
+                raise ValueError(f"Difficulty {name!r} is missing "
+                    f"{', '.join(missing)}")
+            self.profiles[name] = DifficultyProfile(name, spec, data['levels'])
+
+    def __getitem__(self, name):
+        """Return the profile called name."""
+        try:
+            return self.profiles[name]
+        except KeyError:
+            raise ValueError(f"Unknown difficulty {name!r}") from None
+
+    def __iter__(self):
+        """Iterate over the profile names, in menu order."""
+        return iter(self.profiles)
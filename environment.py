@@ -0,0 +1,327 @@
+# Part of Alien Invasion game. A reset/step environment for bots, and a
+# vectorized version that runs many of them across processes.
+#
+# Example: python environment.py --envs 8 --observation pixels
+
+import argparse
+import multiprocessing
+import os
+import random
+from multiprocessing import shared_memory
+from time import perf_counter
+
+import numpy as np
+import pygame
+
+from alien_invasion import AlienInvasion
+from difficulty import DifficultyBook
+from headless import ACTIONS
+
+OBSERVATIONS = ('state', 'pixels')
+
+# Values at the start of a state vector, before the alien and bullet slots.
+STATE_HEADER = 12
+
+class AlienInvasionEnv:
+    """A class to drive one headless game with reset() and step().
+
+    An action is an index into ACTIONS. The observation is either an entity
+    state vector ('state') or the screen scaled down by scale ('pixels'), and
+    the reward is the change in score. Each action is repeated for
+    frame_skip simulation steps; fire is only pressed on the first.
+    """
+
+    def __init__(self, difficulty='normal', observation='state', frame_skip=4,
+            scale=8, max_steps=100_000):
+        """Create the game and work out the observation's shape."""
+        if observation not in OBSERVATIONS:
+            raise ValueError(f"Unknown observation: {observation!r}")
+        self.ai_game = AlienInvasion(headless=True)
+        self.difficulty = difficulty
+        self.observation = observation
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.random = random.Random()
+        self.steps = 0
+        self.score = 0
+
+        settings = self.ai_game.settings
+        self.width, self.height = settings.screen_width, settings.screen_height
+        if observation == 'pixels':
+            size = (self.width // scale, self.height // scale)
+            self.small = pygame.Surface(size)
+            self.shape = (size[1], size[0], 3)
+            self.dtype = np.dtype(np.uint8)
+        else:
+            # One slot per alien of the biggest fleet the difficulty's levels
+            # use, and per bullet it allows; the sprite size, and so the
+            # formations, depend on the difficulty.
+            ai_game = self.ai_game
+            settings.initialize_dynamic_settings(difficulty)
+            ai_game._prepare_difficulty()
+            self.alien_slots = max(len(ai_game._formation(name)) for name in
+                ai_game.formations.for_difficulty(difficulty))
+            self.bullet_slots = settings.max_bullets()
+            self.shape = (STATE_HEADER + self.alien_slots +
+                2 * self.bullet_slots,)
+            self.dtype = np.dtype(np.float32)
+
+    def reset(self, seed=None, out=None):
+        """Start a new game and return its first observation.
+
+        A seed makes this game, and every game reset after it without one,
+        play out the same way again.
+        """
+        if seed is not None:
+            self.random.seed(seed)
+        self.ai_game.new_game(self.difficulty, self.random.getrandbits(32))
+        self.steps = 0
+        self.score = 0
+        return self.observe(out)
+
+    def step(self, action, out=None):
+        """Play action and return (observation, reward, done, info).
+
+        The observation is written into out if given, such as a row of a
+        shared buffer, instead of a new array.
+        """
+        ai_game = self.ai_game
+        actions = ACTIONS[action]
+        moves = tuple(name for name in actions if name != 'fire')
+        active = ai_game.step(actions)
+        for _ in range(self.frame_skip - 1):
+            if not active:
+                break
+            active = ai_game.step(moves)
+        self.steps += 1
+
+        score = ai_game.stats.score
+        reward, self.score = score - self.score, score
+        truncated = active and self.steps >= self.max_steps
+        info = {'score': score, 'level': ai_game.stats.level,
+            'truncated': truncated}
+        return self.observe(out), reward, not active or truncated, info
+
+    def observe(self, out=None):
+        """Return the current observation, written into out if given."""
+        if out is None:
+            out = np.empty(self.shape, self.dtype)
+        if self.observation == 'pixels':
+            self._observe_pixels(out)
+        else:
+            self._observe_state(out)
+        return out
+
+    def _observe_pixels(self, out):
+        """Draw the frame and scale it down into out as rows of RGB."""
+        self.ai_game._update_screen()
+        pygame.transform.scale(self.ai_game.screen, self.small.get_size(),
+            self.small)
+        out[:] = pygame.surfarray.pixels3d(self.small).transpose(1, 0, 2)
+
+    def _observe_state(self, out):
+        """Write the entity state vector into out.
+
+        Positions are scaled to 0..1 of the screen. The header holds the
+        ship, the fleet's box and direction, and the power up; then comes one
+        flag per alien slot and (x, y) per bullet, zero where empty.
+        """
+        ai_game = self.ai_game
+        settings, stats, fleet = ai_game.settings, ai_game.stats, ai_game.aliens
+        width, height = self.width, self.height
+        out[:] = 0
+
+        powerup = next(iter(ai_game.powerups), None)
+        out[:STATE_HEADER] = (
+            ai_game.ship.x / width,
+            stats.ships_left / settings.ship_limit,
+            ai_game.powerup_active,
+            fleet.left / width, fleet.right / width,
+            fleet.top / height, fleet.bottom / height,
+            settings.fleet_direction,
+            fleet.count / max(1, self.alien_slots),
+            powerup is not None,
+            powerup.rect.centerx / width if powerup else 0.0,
+            powerup.rect.centery / height if powerup else 0.0,
+        )
+
+        alive = fleet.alive[:self.alien_slots]
+        start = STATE_HEADER
+        out[start:start + len(alive)] = alive
+        start += self.alien_slots
+        for slot, bullet in zip(range(self.bullet_slots), ai_game.bullets):
+            out[start + 2 * slot] = bullet.rect.centerx / width
+            out[start + 2 * slot + 1] = bullet.y / height
+
+    def close(self):
+        """Stop the game's leaderboard writer."""
+        self.ai_game.leaderboard.close()
+
+
+def _worker(pipe, count, env_args):
+    """Run count environments in a child process, serving the pipe.
+
+    Observations go straight into the parent's shared buffer; only rewards,
+    done flags and infos travel back through the pipe.
+    """
+    envs = [AlienInvasionEnv(**env_args) for _ in range(count)]
+    pipe.send((envs[0].shape, envs[0].dtype.str))
+    name, first = pipe.recv()
+    memory = shared_memory.SharedMemory(name=name)
+    total = first + count
+    obs = np.ndarray((total,) + envs[0].shape, envs[0].dtype,
+        buffer=memory.buf)[first:]
+    try:
+        while True:
+            command, data = pipe.recv()
+            if command == 'reset':
+                for env, seed, out in zip(envs, data, obs):
+                    env.reset(seed, out)
+                pipe.send(None)
+            elif command == 'step':
+                results = []
+                for env, action, out in zip(envs, data, obs):
+                    _, reward, done, info = env.step(action, out)
+                    if done:
+                        # Start the next game straight away; the game that
+                        # ended is only reported in info.
+                        env.reset(out=out)
+                    results.append((reward, done, info))
+                pipe.send(results)
+            elif command == 'close':
+                break
+    finally:
+        del obs
+        memory.close()
+        for env in envs:
+            env.close()
+        pipe.close()
+
+
+class VectorEnv:
+    """A class to step num_envs environments at once across a process pool.
+
+    The environments are split between processes (one per core by default),
+    and every process writes its observations into one shared memory block,
+    so an observation batch is never pickled. A finished game is reset at
+    once, so step() always returns the observations of live games.
+    """
+
+    def __init__(self, num_envs, processes=None, **env_args):
+        """Start the worker processes and allocate the observation buffer."""
+        processes = min(num_envs, processes or os.cpu_count() or 1)
+        self.num_envs = num_envs
+        context = multiprocessing.get_context('spawn')
+        self.pipes = []
+        self.processes = []
+        self.counts = [num_envs // processes + (i < num_envs % processes)
+            for i in range(processes)]
+        for count in self.counts:
+            parent, child = context.Pipe()
+            process = context.Process(target=_worker,
+                args=(child, count, env_args), daemon=True)
+            process.start()
+            child.close()
+            self.pipes.append(parent)
+            self.processes.append(process)
+
+        shape, dtype = self.pipes[0].recv()
+        for pipe in self.pipes[1:]:
+            pipe.recv()
+        self.dtype = np.dtype(dtype)
+        self.shape = (num_envs,) + tuple(shape)
+        self.memory = shared_memory.SharedMemory(create=True,
+            size=max(1, int(np.prod(self.shape)) * self.dtype.itemsize))
+        self.obs = np.ndarray(self.shape, self.dtype, buffer=self.memory.buf)
+        first = 0
+        for pipe, count in zip(self.pipes, self.counts):
+            pipe.send((self.memory.name, first))
+            first += count
+
+    def _split(self, values):
+        """Split one value per environment into one list per worker."""
+        chunks, first = [], 0
+        for count in self.counts:
+            chunks.append(list(values[first:first + count]))
+            first += count
+        return chunks
+
+    def reset(self, seed=None):
+        """Start a game in every environment and return the observations.
+
+        Environment i is seeded with seed + i.
+        """
+        seeds = [None if seed is None else seed + i
+            for i in range(self.num_envs)]
+        for pipe, chunk in zip(self.pipes, self._split(seeds)):
+            pipe.send(('reset', chunk))
+        for pipe in self.pipes:
+            pipe.recv()
+        return self.obs
+
+    def step(self, actions):
+        """Play one action per environment.
+
+        Returns (observations, rewards, dones, infos). The observations are
+        the shared buffer itself, overwritten by the next step; copy them to
+        keep them.
+        """
+        for pipe, chunk in zip(self.pipes, self._split(actions)):
+            pipe.send(('step', chunk))
+        results = []
+        for pipe in self.pipes:
+            results += pipe.recv()
+        rewards = np.array([reward for reward, _, _ in results])
+        dones = np.array([done for _, done, _ in results])
+        return self.obs, rewards, dones, [info for _, _, info in results]
+
+    def close(self):
+        """Stop the workers and free the shared buffer."""
+        for pipe in self.pipes:
+            pipe.send(('close', None))
+        for process in self.processes:
+            process.join()
+        for pipe in self.pipes:
+            pipe.close()
+        del self.obs
+        self.memory.close()
+        self.memory.unlink()
+
+
+def main():
+    """Step a batch of environments with random actions and report the rate."""
+    parser = argparse.ArgumentParser(
+        description='Run Alien Invasion environments in parallel with random '
+        'actions and report steps per second.')
+    parser.add_argument('--envs', type=int, default=os.cpu_count())
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--difficulty', default='normal',
+        choices=tuple(DifficultyBook()))
+    parser.add_argument('--observation', default='state', choices=OBSERVATIONS)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    envs = VectorEnv(args.envs, args.processes, difficulty=args.difficulty,
+        observation=args.observation)
+    rng = np.random.default_rng(args.seed)
+    games = 0
+    try:
+        envs.reset(args.seed)
+        start = perf_counter()
+        for _ in range(args.steps):
+            actions = rng.integers(len(ACTIONS), size=args.envs)
+            _, _, dones, _ = envs.step(actions.tolist())
+            games += int(dones.sum())
+        elapsed = perf_counter() - start
+    finally:
+        envs.close()
+
+    steps = args.steps * args.envs
+    print(f"{args.envs} envs in {len(envs.processes)} processes, "
+        f"observation {envs.shape[1:]} {envs.dtype}: {steps:,} steps in "
+        f"{elapsed:.2f}s, {steps / elapsed:,.0f} steps/s, {games} games finished")
+
+
+if __name__ == '__main__':
+    main()
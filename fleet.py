@@ -0,0 +1,253 @@
+# Part of Alien Invasion game. The alien fleet, stored as NumPy arrays.
+
+import numpy as np
+import pygame
+
+from alien import Alien
+from renderer import touch
+from spatial import SpatialGrid
+from timestep import lerp
+
+# Fewest rects collide_rects() tests as one batch.
+BATCH_MIN = 16
+
+class Fleet:
+    """A class to move, test and draw the whole fleet with array operations.
+
+    Each alien is a slot in the x/y/alive arrays rather than a Sprite, so the
+    cost of a frame doesn't grow with one Python call per alien. Collisions
+    go through a SpatialGrid of where each alien was spawned; the fleet moves
+    as one, so the grid stays valid and only the fleet's offset changes.
+
+    Fleets from a compiled formation also get a CellTable, to test all the
+    bullets in one batch, and big ones are drawn as a single pre-rendered
+    layer that killed aliens are erased from.
+    """
+
+    def __init__(self, ai_game):
+        """Initialize an empty fleet that draws with the Alien image."""
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
+        self.layer_threshold = self.settings.fleet_layer_threshold
+
+        # Counts every new fleet; with formation, the name of the compiled
+        # Formation it came from, so a networked client can rebuild it.
+        self.generation = 0
+        self.formation = None
+
+        # Every alien looks like the prototype Alien.
+        prototype = Alien(ai_game)
+        self.set_sprite(prototype.atlas, prototype.area)
+
+    def set_sprite(self, source, area):
+        """Draw every alien as area of source, and empty the fleet.
+
+        The aliens' size is the area's size.
+        """
+        self.atlas, self.area = source, pygame.Rect(area)
+        self.width, self.height = self.area.size
+        self.grid = SpatialGrid(self.width, self.height)
+        self.empty()
+
+    def empty(self):
+        """Remove every alien from the fleet."""
+        self.x = np.zeros(0)
+        self.prev_x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.alive = np.zeros(0, dtype=bool)
+        self.count = 0
+        self.offset_x = self.offset_y = self.prev_offset_x = 0.0
+        self.grid.clear()
+        self.table = None
+        self.layer = None
+        self.generation += 1
+        self.formation = None
+        self._update_bounds()
+
+    def _update_bounds(self):
+        """Recompute the box around every live alien.
+
+        The fleet moves and drops as one, so the box only has to be rebuilt
+        when aliens are added or removed.
+        """
+        if not self.count:
+            self.left = self.top = self.right = self.bottom = 0.0
+            return
+        x = self.x[self.alive]
+        y = self.y[self.alive]
+        self.left, self.right = x.min(), x.max() + self.width
+        self.top, self.bottom = y.min(), y.max() + self.height
+
+    def spawn_formation(self, formation):
+        """Replace the fleet with a compiled Formation by copying its arrays."""
+        self.x = formation.x.copy()
+        self.prev_x = formation.x.copy()
+        self.y = formation.y.copy()
+        self.alive = formation.alive.copy()
+        self.count = len(formation)
+        self.left, self.right, self.top, self.bottom = formation.bounds
+        self.offset_x = self.offset_y = self.prev_offset_x = 0.0
+        self.grid.load(formation.cells, formation.boxes)
+        self.table = formation.table.copy() if formation.table else None
+        self.generation += 1
+        self.formation = formation.name
+
+        self.layer = None
+        if formation.disjoint and self.count >= self.layer_threshold:
+            self.layer = self._formation_layer(formation).copy()
+            self.layer_origin = formation.bounds[0], formation.bounds[2]
+
+    def _formation_layer(self, formation):
+        """Return the formation drawn with the fleet's sprite, made once."""
+        key = (id(self.atlas), tuple(self.area))
+        layer = formation.layers.get(key)
+        if layer is None:
+            left, right, top, bottom = formation.bounds
+            layer = pygame.Surface((int(right - left), int(bottom - top)),
+                pygame.SRCALPHA)
+            layer.fill((0, 0, 0, 0))
+            atlas, area = self.atlas, self.area
+            layer.blits([(atlas, (x - left, y - top), area,
+                pygame.BLEND_RGBA_MAX) for x, y in
+                zip(formation.x.tolist(), formation.y.tolist())], False)
+            formation.layers[key] = layer
+        return layer
+
+    def __len__(self):
+        """Return the number of aliens still alive."""
+        return self.count
+
+    def __bool__(self):
+        """A fleet is true while any alien is alive."""
+        return self.count > 0
+
+    def check_edges(self):
+        """Return True if any live alien is at an edge of the screen."""
+        if not self.count:
+            return False
+        return self.left <= 0 or self.right >= self.settings.screen_width
+
+    def drop(self):
+        """Drop the entire fleet and change the fleet's direction."""
+        drop = self.settings.fleet_drop_speed
+        self.y += drop
+        self.top += drop
+        self.bottom += drop
+        self.offset_y += drop
+        self.settings.fleet_direction *= -1
+
+    def update(self, dt):
+        """Move the whole fleet sideways by one step."""
+        dx = self.settings.alien_speed * self.settings.fleet_direction * dt
+        self.prev_x[:] = self.x
+        self.prev_offset_x = self.offset_x
+        self.x += dx
+        self.left += dx
+        self.right += dx
+        self.offset_x += dx
+
+    def move_to(self, offset_x, offset_y):
+        """Move the whole fleet to offset from where it spawned, as a step.
+
+        Used to follow a fleet simulated somewhere else.
+        """
+        dx, dy = offset_x - self.offset_x, offset_y - self.offset_y
+        self.prev_x[:] = self.x
+        self.prev_offset_x = self.offset_x
+        self.x += dx
+        self.left += dx
+        self.right += dx
+        self.offset_x = offset_x
+        self.y += dy
+        self.top += dy
+        self.bottom += dy
+        self.offset_y = offset_y
+
+    def check_bottom(self, bottom):
+        """Return True if any live alien has reached bottom."""
+        if not self.count:
+            return False
+        return self.bottom >= bottom
+
+    def collide_rect(self, rect):
+        """Return the slots of live aliens that overlap rect."""
+        if (rect.left >= self.right or rect.right <= self.left or
+                rect.top >= self.bottom or rect.bottom <= self.top):
+            return []
+        dx, dy = self.offset_x, self.offset_y
+        return self.grid.query(rect.left - dx, rect.top - dy,
+            rect.right - dx, rect.bottom - dy)
+
+    def collide_rects(self, rects):
+        """Return (index, slots) for each of rects that hits a live alien.
+
+        Rects are taken in order, and an alien hit by one rect isn't hit
+        again by a later one, as if each hit killed it at once. A handful of
+        rects is cheaper to test one by one than to set up a batch for.
+        """
+        if not self.count or not rects:
+            return []
+        if self.table is None or len(rects) < BATCH_MIN:
+            hits = [(index, self.collide_rect(rect))
+                for index, rect in enumerate(rects)]
+            return self._claim(hits)
+
+        edges = np.array([(rect.left, rect.top, rect.right, rect.bottom)
+            for rect in rects], dtype=float).T
+        left, top, right, bottom = edges
+        near = np.flatnonzero((left < self.right) & (right > self.left) &
+            (top < self.bottom) & (bottom > self.top))
+        if not len(near):
+            return []
+
+        dx, dy = self.offset_x, self.offset_y
+        indices, slots = self.table.query_many(left[near] - dx,
+            top[near] - dy, right[near] - dx, bottom[near] - dy)
+        hits = {}
+        for index, slot in zip(near[indices].tolist(), slots.tolist()):
+            hits.setdefault(index, []).append(slot)
+        return self._claim(sorted(hits.items()))
+
+    def _claim(self, hits):
+        """Drop from (index, slots) hits the aliens an earlier rect hit."""
+        collisions = []
+        taken = set()
+        for index, slots in hits:
+            slots = [slot for slot in slots if slot not in taken]
+            if slots:
+                taken.update(slots)
+                collisions.append((index, slots))
+        return collisions
+
+    def kill(self, slots):
+        """Remove the aliens in slots from the fleet."""
+        if self.layer is not None:
+            # Erase each alien where the layer drew it: its spawn box, not
+            # its position less the offset, which drifts by rounding error.
+            left, top = self.layer_origin
+            boxes = self.grid.boxes
+            for slot in slots:
+                x, y, _ = boxes[slot]
+                self.layer.fill((0, 0, 0, 0), (x - left, y - top,
+                    self.width, self.height))
+            touch(self.layer)
+        for slot in slots:
+            self.grid.remove(slot)
+        if self.table is not None:
+            self.table.remove(slots)
+        self.alive[slots] = False
+        self.count -= len(slots)
+        self._update_bounds()
+
+    def draw_items(self, alpha=1.0):
+        """Return draw list items for every live alien between its last two
+        positions."""
+        if self.layer is not None:
+            left, top = self.layer_origin
+            offset_x = lerp(self.prev_offset_x, self.offset_x, alpha)
+            return [(self.layer, (left + offset_x, top + self.offset_y))]
+        alive = self.alive
+        x = self.prev_x[alive] + (self.x[alive] - self.prev_x[alive]) * alpha
+        atlas, area = self.atlas, self.area
+        return [(atlas, pos, area) for pos in
+            zip(x.tolist(), self.y[alive].tolist())]
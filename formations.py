@@ -0,0 +1,153 @@
+# Part of Alien Invasion game. Fleet formations read from a data file and
+# compiled into ready-to-copy position arrays.
+
+import json
+
+import numpy as np
+
+from spatial import SpatialGrid, CellTable
+
+def _lattice(spec, screen_size, sprite_size, ship_height):
+    """Return (rows, columns, step_x, step_y) of the alien slots that fit.
+
+    Slots are spacing alien sizes apart (2 by default, a gap of one alien
+    between neighbours), with room left above the ship. The spec's rows
+    and columns, if given, cap the lattice.
+    """
+    screen_width, screen_height = screen_size
+    alien_width, alien_height = sprite_size
+    spacing = spec.get('spacing', 2)
+    step_x, step_y = round(spacing * alien_width), round(spacing * alien_height)
+    columns = (screen_width - 2 * alien_width) // step_x
+    rows = (screen_height - 3 * alien_height - ship_height) // step_y
+    columns = min(columns, spec.get('columns', columns))
+    rows = min(rows, spec.get('rows', rows))
+    return max(0, rows), max(0, columns), step_x, step_y
+
+
+def _grid_mask(spec, rows, columns):
+    """Every slot."""
+    return np.ones((rows, columns), dtype=bool)
+
+
+def _checker_mask(spec, rows, columns):
+    """Every other slot, alternating from row to row."""
+    row, column = np.indices((rows, columns))
+    return (row + column) % 2 == spec.get('parity', 0)
+
+
+def _wedge_mask(spec, rows, columns):
+    """A triangle, one alien wider per side each row, pointing at apex."""
+    row, column = np.indices((rows, columns))
+    if spec.get('apex', 'top') == 'bottom':
+        row = rows - 1 - row
+    return np.abs(2 * column - (columns - 1)) <= 2 * row + 1
+
+
+def _pattern_mask(spec, rows, columns):
+    """Rows of 'X' (alien) and '.' (gap), centred and clipped to fit."""
+    pattern = spec['pattern']
+    width = max(len(line) for line in pattern)
+    left = (columns - width) // 2
+    mask = np.zeros((rows, columns), dtype=bool)
+    for row, line in enumerate(pattern[:rows]):
+        for offset, char in enumerate(line):
+            column = left + offset
+            if char == 'X' and 0 <= column < columns:
+                mask[row, column] = True
+    return mask
+
+
+LAYOUTS = {'grid': _grid_mask, 'checker': _checker_mask,
+    'wedge': _wedge_mask, 'pattern': _pattern_mask}
+
+class Formation:
+    """A class to hold one compiled layout, ready to be copied into a Fleet.
+
+    Besides the alien positions it keeps the spatial grid, cell table and
+    bounds they make, so putting the formation on screen copies arrays and
+    dicts instead of rebuilding anything.
+    """
+
+    def __init__(self, name, x, y, sprite_size):
+        """Compile the grid buckets and bounds for aliens at x, y."""
+        self.name = name
+        self.x = x
+        self.y = y
+        self.alive = np.ones(len(x), dtype=bool)
+        width, height = sprite_size
+
+        grid = SpatialGrid(width, height)
+        for slot, (alien_x, alien_y) in enumerate(zip(x.tolist(), y.tolist())):
+            grid.insert(slot, alien_x, alien_y)
+        self.cells, self.boxes = grid.cells, grid.boxes
+        self.table = CellTable.build(width, height, x, y)
+
+        # Distinct columns and rows at least a sprite apart (and no two
+        # aliens in one cell) mean no two aliens overlap.
+        self.disjoint = self.table is not None and all(
+            len(values) < 2 or np.diff(values).min() >= size
+            for values, size in ((np.unique(x), width), (np.unique(y), height)))
+
+        # Pre-rendered images of the whole formation, by sprite.
+        self.layers = {}
+
+        if len(x):
+            self.bounds = (x.min(), x.max() + width, y.min(), y.max() + height)
+        else:
+            self.bounds = (0.0, 0.0, 0.0, 0.0)
+
+    def __len__(self):
+        """Return the number of aliens in the formation."""
+        return len(self.x)
+
+
+class FormationBook:
+    """A class to load formations and the order levels use them in.
+
+    Each difficulty can have its own level list; the rest use 'default'.
+    Each formation is compiled once per screen size, sprite size and ship
+    height, and cached.
+    """
+
+    def __init__(self, path='files/formations.json'):
+        """Read the formation definitions from path."""
+        with open(path) as file_object:
+            data = json.load(file_object)
+        self.specs = data['formations']
+        self.levels = data['levels']
+        for name, spec in self.specs.items():
+            if spec['type'] not in LAYOUTS:
+                raise ValueError(f"Formation {name!r} has unknown type "
+                    f"{spec['type']!r}")
+        for difficulty, names in self.levels.items():
+            for name in names:
+                if name not in self.specs:
+                    raise ValueError(f"Level list {difficulty!r} names "
+                        f"unknown formation {name!r}")
+        self.compiled = {}
+
+    def for_level(self, level, difficulty='normal'):
+        """Return the name of the formation for level, cycling the list."""
+        levels = self.for_difficulty(difficulty)
+        return levels[(level - 1) % len(levels)]
+
+    def for_difficulty(self, difficulty='normal'):
+        """Return the names of the formations difficulty's levels cycle through."""
+        return self.levels.get(difficulty, self.levels['default'])
+
+    def compile(self, name, screen_size, sprite_size, ship_height):
+        """Return the Formation for name laid out for these sizes."""
+        key = (name, tuple(screen_size), tuple(sprite_size), ship_height)
+        formation = self.compiled.get(key)
+        if formation is None:
+            spec = self.specs[name]
+            rows, columns, step_x, step_y = _lattice(spec, screen_size,
+                sprite_size, ship_height)
+            mask = LAYOUTS[spec['type']](spec, rows, columns)
+            row, column = np.nonzero(mask)
+            alien_width, alien_height = sprite_size
+            x = (alien_width + step_x * column).astype(float)
+            y = (alien_height + step_y * row).astype(float)
+            formation = self.compiled[key] = Formation(name, x, y, sprite_size)
+        return formation
@@ -0,0 +1,42 @@
+# Part of Alien Invasion game. The states a game moves through.
+
+PLAYING = 'playing'
+RESPAWN_PAUSE = 'respawn pause'
+POWERUP_FLASH = 'powerup flash'
+GAME_OVER = 'game over'
+
+# Message shown over the game while a timed state lasts.
+MESSAGES = {RESPAWN_PAUSE: "Get ready!", POWERUP_FLASH: "Power up!"}
+
+class GameState:
+    """A class to track the game's state and when a timed state ends.
+
+    Time is measured in simulation ticks, so a pause keeps events and
+    drawing going instead of blocking the loop, and plays out the same way
+    headless as on screen.
+    """
+
+    def __init__(self):
+        """Start in the game over state, where the menu is shown."""
+        self.state = GAME_OVER
+        self.ends_at = None
+
+    def enter(self, state, now=0, duration=None):
+        """Switch to state; a timed state returns to playing after duration ticks."""
+        self.state = state
+        self.ends_at = None if duration is None else now + duration
+
+    def update(self, now):
+        """Return to playing once a timed state has run out."""
+        if self.ends_at is not None and now >= self.ends_at:
+            self.enter(PLAYING)
+
+    @property
+    def playing(self):
+        """True while the simulation should advance."""
+        return self.state == PLAYING
+
+    @property
+    def message(self):
+        """The message for a timed state, or None."""
+        return MESSAGES.get(self.state)
@@ -4,6 +4,7 @@ class GameStats:
     def __init__(self, ai_game):
         """Initialize statistics."""
         self.settings = ai_game.settings
+        self.leaderboard = ai_game.leaderboard
         self.reset_stats()
 
         # Start Alien Invasion in an inactive state.
@@ -14,14 +15,14 @@ class GameStats:
         self.load_high_score()
 
     def load_high_score(self):
-        """Reads from a file to load the high score."""
-        try:
-            with open('files/high_score.txt') as file_object:
-                self.high_score = int(file_object.read().strip())
-        except (FileNotFoundError, ValueError):
-            self.high_score = 0 # Set to default if the file doesn't exist or content is invalid.
+        """Load the best score on the leaderboard across all difficulties."""
+        self.high_score = self.leaderboard.best()
 
-        # TODO: read the high score file
+    def save_score(self):
+        """Record the current game's score on the leaderboard."""
+        if self.score:
+            self.leaderboard.submit(self.settings.difficulty, self.score,
+                self.level)
 
     def reset_stats(self):
         """Initialize statistics that can change during the game."""
@@ -0,0 +1,74 @@
+# Part of Alien Invasion game. Run games headlessly at maximum speed.
+#
+# Example: python headless.py --games 20 --difficulty hard --seed 1
+
+import argparse
+import random
+from time import perf_counter
+
+from alien_invasion import AlienInvasion
+from difficulty import DifficultyBook
+
+ACTIONS = ((), ('left',), ('right',), ('fire',), ('left', 'fire'),
+    ('right', 'fire'))
+
+class HeadlessRunner:
+    """A class to play whole games without a display and time them."""
+
+    def __init__(self, difficulty='normal', seed=None, max_steps=200_000):
+        """Create one headless game that is reused for every run."""
+        self.ai_game = AlienInvasion(headless=True)
+        self.difficulty = difficulty
+        self.random = random.Random(seed)
+        self.max_steps = max_steps
+        self.steps = 0
+        self.elapsed = 0.0
+
+    def play(self, policy=None):
+        """Play one game with policy (a callable returning actions)."""
+        policy = policy or self.random_policy
+        ai_game = self.ai_game
+        ai_game.new_game(self.difficulty, self.random.getrandbits(32))
+
+        steps = 0
+        start = perf_counter()
+        while steps < self.max_steps and ai_game.step(policy(ai_game)):
+            steps += 1
+        self.elapsed += perf_counter() - start
+        self.steps += steps
+        return ai_game.stats.score
+
+    def random_policy(self, ai_game):
+        """Pick a random action every step."""
+        return self.random.choice(ACTIONS)
+
+    @property
+    def steps_per_second(self):
+        """Simulation steps per wall-clock second so far."""
+        return self.steps / self.elapsed if self.elapsed else 0.0
+
+
+def main():
+    """Play a batch of headless games and report the simulation rate."""
+    parser = argparse.ArgumentParser(
+        description='Play Alien Invasion headlessly and report steps per second.')
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--difficulty', default='normal',
+        choices=tuple(DifficultyBook()))
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--max-steps', type=int, default=200_000)
+    args = parser.parse_args()
+
+    runner = HeadlessRunner(args.difficulty, args.seed, args.max_steps)
+    for game in range(args.games):
+        score = runner.play()
+        print(f"game {game + 1}: score {score:,}")
+
+    games_per_minute = args.games / runner.elapsed * 60 if runner.elapsed else 0
+    print(f"{runner.steps:,} steps in {runner.elapsed:.2f}s: "
+        f"{runner.steps_per_second:,.0f} steps/s, "
+        f"{games_per_minute:,.1f} games/min")
+
+
+if __name__ == '__main__':
+    main()
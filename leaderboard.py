@@ -0,0 +1,168 @@
+# Part of Alien Invasion game. Local leaderboard stored in SQLite.
+
+import queue
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+# The largest score SQLite can store; anything higher is recorded as this.
+MAX_SCORE = 2**63 - 1
+
+class Leaderboard:
+    """A class to keep a table of scores per difficulty.
+
+    Reads happen on the caller's connection. Writes are queued and committed
+    by a background thread on its own connection, so recording a score never
+    holds up a frame. The database runs in WAL mode with full sync, so a
+    committed score survives a crash and a crash mid-write loses nothing
+    that was already stored.
+    """
+
+    def __init__(self, path='files/leaderboard.db',
+            legacy_path='files/high_score.txt', difficulties=()):
+        """Open (or create) the database and start the writer thread.
+
+        A table is made for each of difficulties up front; any other
+        difficulty gets one when its first score is submitted. With path
+        None the leaderboard lives in memory only, for headless runs that
+        shouldn't touch the player's scores.
+        """
+        if path is None:
+            path = f"file:leaderboard{id(self)}?mode=memory&cache=shared"
+            legacy_path = None
+        self.path = path
+        self.connection = self._connect()
+        self.tables = set()
+        with self.connection:
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY, value TEXT NOT NULL)""")
+            # The old high score file migrates into the normal table.
+            for difficulty in {'normal', *difficulties}:
+                self._create_table(difficulty)
+        for (table,) in self.connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' "
+                "AND name LIKE 'scores_%'"):
+            self.tables.add(table[len('scores_'):])
+        if legacy_path:
+            self._migrate(legacy_path)
+
+        self.writes = queue.Queue()
+        self.writer = threading.Thread(target=self._write_behind,
+            name='leaderboard-writer', daemon=True)
+        self.writer.start()
+
+    def _connect(self):
+        """Open a connection with the durability settings."""
+        connection = sqlite3.connect(self.path, uri=self.path.startswith('file:'),
+            check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=FULL")
+        return connection
+
+    def _table(self, difficulty):
+        """Return the table name for difficulty."""
+        if not re.fullmatch(r'[a-z_]+', difficulty):
+            raise ValueError(f"Bad difficulty name: {difficulty!r}")
+        return f"scores_{difficulty}"
+
+    def _create_table(self, difficulty):
+        """Create the score table and its index for difficulty."""
+        table = self._table(difficulty)
+        self.connection.execute(f"""CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY,
+            score INTEGER NOT NULL,
+            level INTEGER NOT NULL,
+            played_at TEXT NOT NULL)""")
+        self.connection.execute(f"""CREATE INDEX IF NOT EXISTS
+            {table}_score ON {table} (score DESC)""")
+        self.tables.add(difficulty)
+
+    def _migrate(self, legacy_path):
+        """Copy the old high score file into the normal table, once."""
+        done = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'migrated'").fetchone()
+        if done:
+            return
+        try:
+            with open(legacy_path) as file_object:
+                high_score = int(file_object.read().strip())
+        except (FileNotFoundError, ValueError):
+            high_score = 0
+
+        with self.connection:
+            if high_score:
+                self.connection.execute(
+                    "INSERT INTO scores_normal (score, level, played_at) "
+                    "VALUES (?, 0, ?)", (high_score, _now()))
+            self.connection.execute(
+                "INSERT INTO meta (key, value) VALUES ('migrated', ?)",
+                (legacy_path,))
+
+    def submit(self, difficulty, score, level):
+        """Queue a finished game's score; returns without waiting for disk."""
+        if difficulty not in self.tables:
+            with self.connection:
+                self._create_table(difficulty)
+        self.writes.put((self._table(difficulty), min(score, MAX_SCORE), level,
+            _now()))
+
+    def _write_behind(self):
+        """Commit queued scores until close() sends None."""
+        connection = self._connect()
+        while True:
+            write = self.writes.get()
+            try:
+                if write is None:
+                    return
+                table, score, level, played_at = write
+                with connection:
+                    connection.execute(
+                        f"INSERT INTO {table} (score, level, played_at) "
+                        "VALUES (?, ?, ?)", (score, level, played_at))
+            except Exception as e:
+                # Losing one score is better than losing the writer, and
+                # every score queued after it.
+                print(f"Error writing score: {e}")
+            finally:
+                self.writes.task_done()
+
+    def flush(self):
+        """Wait until every queued score has been committed."""
+        self.writes.join()
+
+    def close(self):
+        """Commit anything queued, stop the writer and close the database."""
+        self.writes.put(None)
+        self.writer.join()
+        self.connection.close()
+
+    def top(self, difficulty, n=10):
+        """Return the n best (score, level, played_at) rows for difficulty."""
+        table = self._table(difficulty)
+        return self.connection.execute(
+            f"SELECT score, level, played_at FROM {table} "
+            "ORDER BY score DESC LIMIT ?", (n,)).fetchall()
+
+    def best(self, difficulty=None):
+        """Return the best score for difficulty, or across all of them."""
+        difficulties = [difficulty] if difficulty else sorted(self.tables)
+        best = 0
+        for name in difficulties:
+            row = self.top(name, 1)
+            if row:
+                best = max(best, row[0][0])
+        return best
+
+    def rank(self, difficulty, score):
+        """Return where score would place on difficulty's table (1 is top)."""
+        table = self._table(difficulty)
+        (better,) = self.connection.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE score > ?",
+            (min(score, MAX_SCORE),)).fetchone()
+        return better + 1
+
+
+def _now():
+    """Return the current time as an ISO 8601 string."""
+    return datetime.now().isoformat(timespec='seconds')
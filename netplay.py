@@ -0,0 +1,657 @@
+# Part of Alien Invasion game. Two-player games over UDP: the host runs the
+# only simulation, the client sends its input and draws the host's snapshots.
+#
+# Example: python netplay.py host
+#          python netplay.py join 192.168.1.20
+#          python netplay.py loopback --difficulty swarm --seconds 10
+#
+# Every packet starts with MAGIC, VERSION and a packet type. The client sends
+# INPUT packets (its movement keys, a running count of shots and the newest
+# snapshot it has) every frame; the host sends a SNAPSHOT at a fixed rate.
+#
+# A snapshot carries the fleet as the name of its formation, its offset and
+# a bitmap of which aliens are alive. The bitmap is XORed with the bitmap of
+# the newest snapshot the client acknowledged, so an alien only costs a bit
+# in the snapshot after it dies; bullets and the bitmap are then compressed.
+
+import argparse
+import multiprocessing
+import random
+import select
+import socket
+import struct
+import zlib
+from time import perf_counter, perf_counter_ns, sleep
+
+import numpy as np
+import pygame
+
+from alien_invasion import AlienInvasion
+from difficulty import DifficultyBook
+from game_state import PLAYING, RESPAWN_PAUSE, POWERUP_FLASH, GAME_OVER
+from headless import ACTIONS
+from powerup import PowerUp
+from ship import Ship
+
+MAGIC = b'AN'
+VERSION = 2
+HELLO, WELCOME, INPUT, SNAPSHOT, BYE = range(5)
+
+PACKET = struct.Struct('<2sBB')
+WELCOME_BODY = struct.Struct('<HH')
+INPUT_BODY = struct.Struct('<IIBI')
+SNAPSHOT_BODY = struct.Struct('<IIIHqHBBBddddBhhH')
+
+# Game states by number, for snapshots.
+STATES = (PLAYING, RESPAWN_PAUSE, POWERUP_FLASH, GAME_OVER)
+
+# Movement bits of an INPUT packet.
+LEFT, RIGHT = 1, 2
+
+# Snapshots kept for use as delta baselines, and how long a silent client
+# is kept.
+HISTORY = 128
+CLIENT_TIMEOUT = 5.0
+
+# Largest UDP payload.
+MAX_PACKET = 65507
+
+# Most shots one INPUT packet can fire, so a bogus count can't stall the host.
+MAX_FIRES = 8
+
+BULLET = np.dtype([('x', '<i2'), ('y', '<i2'), ('powerup', 'u1')])
+
+def _packet(kind, body=b''):
+    """Return a packet of kind with body."""
+    return PACKET.pack(MAGIC, VERSION, kind) + body
+
+
+def _parse(data):
+    """Return (kind, body) of a packet, or (None, None) if it isn't ours."""
+    if len(data) < PACKET.size:
+        return None, None
+    magic, version, kind = PACKET.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        return None, None
+    return kind, data[PACKET.size:]
+
+
+def _pack_name(name):
+    """Return name as a length-prefixed string."""
+    data = name.encode()
+    return bytes((len(data),)) + data
+
+
+def _unpack_name(data, offset):
+    """Read a length-prefixed string at offset; return (name, new offset)."""
+    length = data[offset]
+    end = offset + 1 + length
+    return data[offset + 1:end].decode(), end
+
+
+def _tinted(ship, color):
+    """Give ship a copy of its image multiplied by color."""
+    image = ship.atlas.subsurface(ship.area).copy()
+    image.fill(color, special_flags=pygame.BLEND_RGB_MULT)
+    ship.atlas, ship.area = image, image.get_rect()
+    return ship
+
+
+class NetStats:
+    """A class to count one peer's traffic and the time spent on it."""
+
+    def __init__(self):
+        """Start every count at zero."""
+        self.start = perf_counter()
+        self.sent_packets = self.sent_bytes = 0
+        self.received_packets = self.received_bytes = 0
+        self.snapshots = self.snapshot_bytes = self.max_snapshot = 0
+        self.full_snapshots = 0
+        self.snapshot_ns = 0
+        self.ticks = self.tick_ns = self.max_tick_ns = 0
+
+    def sent(self, size):
+        """Count a packet of size bytes sent."""
+        self.sent_packets += 1
+        self.sent_bytes += size
+
+    def received(self, size):
+        """Count a packet of size bytes received."""
+        self.received_packets += 1
+        self.received_bytes += size
+
+    def snapshot(self, size, full, ns):
+        """Count a snapshot of size bytes, encoded or decoded in ns."""
+        self.snapshots += 1
+        self.snapshot_bytes += size
+        self.max_snapshot = max(self.max_snapshot, size)
+        self.full_snapshots += full
+        self.snapshot_ns += ns
+
+    def tick(self, ns):
+        """Count a simulation step that took ns."""
+        self.ticks += 1
+        self.tick_ns += ns
+        self.max_tick_ns = max(self.max_tick_ns, ns)
+
+    def summary(self):
+        """Return the counts and rates as a dictionary."""
+        seconds = max(perf_counter() - self.start, 1e-9)
+        snapshots = max(self.snapshots, 1)
+        return {'seconds': seconds,
+            'sent_packets': self.sent_packets, 'sent_bytes': self.sent_bytes,
+            'received_packets': self.received_packets,
+            'received_bytes': self.received_bytes,
+            'send_kbps': self.sent_bytes * 8 / 1000 / seconds,
+            'receive_kbps': self.received_bytes * 8 / 1000 / seconds,
+            'snapshots': self.snapshots,
+            'full_snapshots': self.full_snapshots,
+            'mean_snapshot_bytes': self.snapshot_bytes / snapshots,
+            'max_snapshot_bytes': self.max_snapshot,
+            'mean_snapshot_ms': self.snapshot_ns / snapshots / 1e6,
+            'mean_tick_ms': self.tick_ns / max(self.ticks, 1) / 1e6,
+            'max_tick_ms': self.max_tick_ns / 1e6}
+
+    def report(self, name):
+        """Return a one-line summary of the peer's traffic."""
+        s = self.summary()
+        line = (f"{name}: sent {s['sent_bytes']:,} bytes "
+            f"({s['send_kbps']:.1f} kbit/s), received "
+            f"{s['received_bytes']:,} bytes ({s['receive_kbps']:.1f} kbit/s); "
+            f"{s['snapshots']:,} snapshots, {s['full_snapshots']:,} full, "
+            f"mean {s['mean_snapshot_bytes']:.0f} bytes, "
+            f"max {s['max_snapshot_bytes']:,} bytes, "
+            f"{s['mean_snapshot_ms']:.3f} ms each")
+        if self.ticks:
+            line += (f"; steps {s['mean_tick_ms']:.3f} ms mean, "
+                f"{s['max_tick_ms']:.3f} ms max")
+        return line
+
+
+class NetHost:
+    """A class to run a game for two players, with the client's ship as the
+    game's partner ship.
+
+    The host's game is the only simulation. Input from the client steers and
+    fires the partner ship; every 1 / net_snapshot_rate seconds of game time
+    the client is sent a snapshot of everything it draws.
+    """
+
+    def __init__(self, ai_game, port=None, address=''):
+        """Listen for a client on port for ai_game."""
+        self.ai_game = ai_game
+        settings = ai_game.settings
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((address, settings.net_port if port is None else port))
+        self.socket.setblocking(False)
+        self.port = self.socket.getsockname()[1]
+        self.interval = max(1, settings.tick_rate // settings.net_snapshot_rate)
+
+        # The recorder and save states only know about one ship, so replays
+        # and saves of a two-player game wouldn't play back.
+        ai_game.recorder.directory = None
+        ai_game.settings.save_path = None
+        ai_game.net = self
+
+        self.client = None
+        self.last_heard = 0.0
+        self.input_seq = 0
+        self.fires = 0
+        self.acked = 0
+
+        # Network ticks count every step, in menus too, so they never repeat.
+        self.tick = 0
+        self.history = {}
+        self.sent = {}
+        self.stats = NetStats()
+
+    def receive(self):
+        """Handle every packet waiting on the socket."""
+        while True:
+            try:
+                data, address = self.socket.recvfrom(MAX_PACKET)
+            except (BlockingIOError, InterruptedError):
+                break
+            except ConnectionResetError:
+                continue
+            kind, body = _parse(data)
+            if kind is None:
+                continue
+            self.stats.received(len(data))
+            if kind == HELLO:
+                self._join(address)
+            elif address != self.client:
+                continue
+            elif kind == INPUT:
+                self._input(body)
+            elif kind == BYE:
+                self._leave()
+            self.last_heard = perf_counter()
+
+        if self.client and perf_counter() - self.last_heard > CLIENT_TIMEOUT:
+            self._leave()
+
+    def _join(self, address):
+        """Take address as the client, or welcome it again."""
+        ai_game = self.ai_game
+        if address != self.client:
+            self.client = address
+            self.input_seq = self.fires = self.acked = 0
+            self.history.clear()
+            ai_game.partner = _tinted(Ship(ai_game), (120, 180, 255))
+            ai_game.partner.center_ship(ai_game.settings.partner_offset)
+            print(f"Player 2 joined from {address[0]}:{address[1]}")
+        self._send(_packet(WELCOME, WELCOME_BODY.pack(
+            ai_game.settings.tick_rate, ai_game.settings.net_snapshot_rate)))
+
+    def _leave(self):
+        """Forget the client and take its ship out of the game."""
+        print("Player 2 left")
+        self.client = None
+        self.ai_game.partner = None
+
+    def _input(self, body):
+        """Steer and fire the partner ship from an INPUT packet."""
+        if len(body) < INPUT_BODY.size:
+            return
+        seq, ack, keys, fires = INPUT_BODY.unpack_from(body)
+        if seq <= self.input_seq:
+            # Late or repeated; a newer one has been applied.
+            return
+        self.input_seq = seq
+        if ack in self.history:
+            self.acked = max(self.acked, ack)
+
+        partner = self.ai_game.partner
+        partner.moving_left = bool(keys & LEFT)
+        partner.moving_right = bool(keys & RIGHT)
+        # Shots are a running count, so a lost packet loses none of them.
+        for _ in range(min(fires - self.fires, MAX_FIRES)):
+            if self.ai_game.stats.game_active:
+                self.ai_game._fire_bullet(partner)
+        self.fires = fires
+
+    def _send(self, data):
+        """Send data to the client."""
+        try:
+            self.socket.sendto(data, self.client)
+        except OSError:
+            return
+        self.stats.sent(len(data))
+
+    def stepped(self, ns=0):
+        """Count a step that took ns, and send a snapshot if one is due."""
+        if self.ai_game.stats.game_active:
+            self.stats.tick(ns)
+        self.tick += 1
+        if self.client and self.tick % self.interval == 0:
+            self._send(self.encode_snapshot())
+
+    def encode_snapshot(self):
+        """Return a SNAPSHOT packet of the game as it is now."""
+        start = perf_counter_ns()
+        ai_game = self.ai_game
+        fleet, stats = ai_game.aliens, ai_game.stats
+
+        bits = np.packbits(fleet.alive)
+        baseline = self.history.get(self.acked)
+        if baseline is not None and baseline[0] == fleet.generation:
+            base_tick, delta = self.acked, bits ^ baseline[1]
+        else:
+            base_tick, delta = 0, bits
+        self.history[self.tick] = (fleet.generation, bits)
+        self.history.pop(self.tick - HISTORY * self.interval, None)
+
+        bullets = np.array([(bullet.rect.centerx, bullet.rect.top,
+            bullet.powerup) for bullet in ai_game.bullets], dtype=BULLET)
+        powerup = next(iter(ai_game.powerups), None)
+        partner = ai_game.partner
+        header = SNAPSHOT_BODY.pack(self.tick, base_tick, fleet.generation,
+            len(fleet.alive), stats.score, stats.level, stats.ships_left,
+            stats.game_active, STATES.index(ai_game.state.state),
+            fleet.offset_x, fleet.offset_y, ai_game.ship.x,
+            partner.x if partner else 0.0, powerup is not None,
+            powerup.rect.x if powerup else 0, powerup.rect.y if powerup else 0,
+            len(bullets))
+        body = zlib.compress(delta.tobytes() + bullets.tobytes(), 1)
+        data = _packet(SNAPSHOT, header + _pack_name(
+            ai_game.settings.difficulty) + _pack_name(fleet.formation or '')
+            + body)
+
+        # What was sent, to check a client against.
+        self.sent[self.tick] = (stats.score, fleet.count, len(bullets))
+        self.sent.pop(self.tick - HISTORY * self.interval, None)
+        self.stats.snapshot(len(data), base_tick == 0,
+            perf_counter_ns() - start)
+        return data
+
+    def close(self):
+        """Tell the client the game is over and stop listening."""
+        if self.client:
+            self._send(_packet(BYE))
+        self.socket.close()
+
+    def run(self):
+        """Play as player 1 until the window is closed.
+
+        This is the game's own main loop, so controls, rewind and capture
+        work as in a one-player game; it calls receive() and stepped()
+        through ai_game.net.
+        """
+        print(f"Hosting on port {self.port}")
+        try:
+            self.ai_game.run_game()
+        finally:
+            print(self.stats.report('host'))
+            self.close()
+
+
+class NetClient:
+    """A class to play as player 2: send input, and draw the host's game.
+
+    The client's game never simulates. Each snapshot is decoded against the
+    baseline it names and written into the game's fleet, bullets, ships
+    and scoreboard, which are then drawn as usual, with the client's own
+    ship as the game's ship and the host's as its partner.
+    """
+
+    def __init__(self, ai_game, address, port=None):
+        """Get ready to join the host at address."""
+        self.ai_game = ai_game
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.connect((address,
+            ai_game.settings.net_port if port is None else port))
+        self.socket.setblocking(False)
+        ai_game.partner = _tinted(Ship(ai_game), (120, 180, 255))
+        # The host's game isn't this player's to save.
+        ai_game.settings.save_path = None
+
+        self.welcomed = False
+        self.closed = False
+        self.seq = 0
+        self.keys = 0
+        self.fires = 0
+        self.tick = 0
+        self.history = {}
+        self.last = None
+        self.stats = NetStats()
+
+    def _send(self, data):
+        """Send data to the host."""
+        try:
+            self.socket.send(data)
+        except OSError:
+            return
+        self.stats.sent(len(data))
+
+    def send_input(self):
+        """Send the keys held, the shots so far and the newest snapshot."""
+        if not self.welcomed:
+            self._send(_packet(HELLO))
+            return
+        self.seq += 1
+        self._send(_packet(INPUT, INPUT_BODY.pack(self.seq, self.tick,
+            self.keys, self.fires)))
+
+    def receive(self, timeout=0.0):
+        """Handle every packet waiting, waiting up to timeout for the first."""
+        newest = None
+        if timeout and not select.select([self.socket], [], [], timeout)[0]:
+            return False
+        while True:
+            try:
+                data = self.socket.recv(MAX_PACKET)
+            except (BlockingIOError, InterruptedError):
+                break
+            except ConnectionRefusedError:
+                # No host yet; HELLO is sent again next frame.
+                break
+            kind, body = _parse(data)
+            if kind is None:
+                continue
+            self.stats.received(len(data))
+            if kind == WELCOME:
+                self.welcomed = True
+            elif kind == BYE:
+                self.closed = True
+            elif kind == SNAPSHOT:
+                snapshot = self.decode_snapshot(body, len(data))
+                if snapshot and (newest is None or snapshot[0] > newest[0]):
+                    newest = snapshot
+        if newest is not None and newest[0] > self.tick:
+            self.tick = newest[0]
+            self.apply(newest)
+        return newest is not None
+
+    def decode_snapshot(self, body, size):
+        """Return a SNAPSHOT body as a tuple, or None if it can't be read."""
+        start = perf_counter_ns()
+        if len(body) < SNAPSHOT_BODY.size:
+            return None
+        header = SNAPSHOT_BODY.unpack_from(body)
+        tick, base_tick, generation, slots = header[:4]
+        state, positions = header[8], header[9:13]
+        ai_game = self.ai_game
+        try:
+            difficulty, offset = _unpack_name(body, SNAPSHOT_BODY.size)
+            formation, offset = _unpack_name(body, offset)
+            data = zlib.decompress(body[offset:])
+            length = (slots + 7) // 8
+            bits = np.frombuffer(data, np.uint8, length)
+            bullets = np.frombuffer(data, BULLET, offset=length)
+        except (IndexError, ValueError, zlib.error):
+            return None
+        # Only what apply() can use: known names, a state it can enter and
+        # positions that fit in a Rect (a NaN fails the comparison too).
+        if (difficulty not in ai_game.settings.difficulties.profiles
+                or (formation and formation not in ai_game.formations.specs)
+                or state >= len(STATES)
+                or not all(abs(value) < 2**30 for value in positions)):
+            return None
+        if base_tick:
+            baseline = self.history.get(base_tick)
+            if (baseline is None or baseline[0] != generation
+                    or len(baseline[1]) != length):
+                return None
+            bits = bits ^ baseline[1]
+        self.history[tick] = (generation, bits)
+        for old in [old for old in self.history if old <= tick - HISTORY * 4]:
+            del self.history[old]
+
+        alive = np.unpackbits(bits, count=slots).astype(bool)
+        self.stats.snapshot(size, base_tick == 0, perf_counter_ns() - start)
+        return (tick, header, difficulty, formation, alive, bullets)
+
+    def apply(self, snapshot):
+        """Write a decoded snapshot into the game."""
+        ai_game = self.ai_game
+        settings, fleet, stats, sb = (ai_game.settings, ai_game.aliens,
+            ai_game.stats, ai_game.sb)
+        tick, header, difficulty, formation, alive, bullets = snapshot
+        (_, _, generation, _, score, level, ships_left, active, state,
+            offset_x, offset_y, host_x, client_x, has_powerup, powerup_x,
+            powerup_y, _) = header
+
+        if difficulty != settings.difficulty:
+            settings.initialize_dynamic_settings(difficulty)
+            ai_game._prepare_difficulty()
+            self.last = None
+        if self.last is None or generation != self.last:
+            fleet.empty()
+            if formation:
+                fleet.spawn_formation(ai_game._formation(formation))
+            self.last = generation
+        if len(fleet.alive) == len(alive):
+            fleet.move_to(offset_x, offset_y)
+            dead = np.flatnonzero(fleet.alive & ~alive)
+            if len(dead):
+                fleet.kill(dead.tolist())
+
+        for ship, x in ((ai_game.ship, client_x), (ai_game.partner, host_x)):
+            ship.x = ship.prev_x = x
+            ship.rect.x = x
+
+        pool = ai_game.bullets
+        pool.empty()
+        pool.reserve(len(bullets))
+        for x, y, powerup in bullets.tolist():
+            pool.fire(pygame.Rect(x, y, 0, 0), bool(powerup))
+
+        if not has_powerup:
+            ai_game.powerups.empty()
+        else:
+            if not ai_game.powerups:
+                ai_game.powerups.add(PowerUp(ai_game))
+            for powerup in ai_game.powerups:
+                powerup.rect.topleft = (powerup_x, powerup_y)
+
+        if (score, level, ships_left) != (stats.score, stats.level,
+                stats.ships_left):
+            stats.score, stats.level, stats.ships_left = score, level, ships_left
+            sb.prep_score()
+            sb.prep_level()
+            sb.prep_ships()
+            sb.check_high_score()
+        stats.game_active = bool(active)
+        ai_game.state.enter(STATES[state])
+
+    def close(self):
+        """Tell the host this player is leaving."""
+        self._send(_packet(BYE))
+        self.socket.close()
+
+    def _check_events(self):
+        """Read the play keys; return False once the player quits."""
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_q:
+                    return False
+                if event.key == pygame.K_SPACE:
+                    self.fires += 1
+            if event.type in (pygame.KEYDOWN, pygame.KEYUP):
+                bit = {pygame.K_LEFT: LEFT, pygame.K_RIGHT: RIGHT}.get(
+                    event.key, 0)
+                if event.type == pygame.KEYDOWN:
+                    self.keys |= bit
+                else:
+                    self.keys &= ~bit
+        return True
+
+    def run(self):
+        """Play as player 2 until the window is closed or the host leaves."""
+        ai_game = self.ai_game
+        try:
+            while not self.closed and self._check_events():
+                ai_game.clock.tick(ai_game.settings.max_fps)
+                self.send_input()
+                self.receive()
+                ai_game._update_screen()
+                ai_game.renderer.present()
+        finally:
+            print(self.stats.report('client'))
+            self.close()
+
+
+def _loopback_client(port, seed, pipe):
+    """Join the host on port with random input; send back what was seen."""
+    ai_game = AlienInvasion(headless=True)
+    client = NetClient(ai_game, '127.0.0.1', port)
+    rng = random.Random(seed)
+    quiet_since = perf_counter()
+    while not client.closed and perf_counter() - quiet_since < CLIENT_TIMEOUT:
+        if rng.random() < 0.05:
+            client.keys = rng.choice((0, LEFT, RIGHT))
+        if rng.random() < 0.2:
+            client.fires += 1
+        client.send_input()
+        if client.receive(timeout=1 / 60):
+            quiet_since = perf_counter()
+    client.close()
+    pipe.send((client.tick, ai_game.stats.score, ai_game.aliens.count,
+        len(ai_game.bullets), client.stats.summary()))
+
+
+def loopback(difficulty='normal', seconds=10.0, seed=None):
+    """Play host and client against each other over 127.0.0.1.
+
+    The host runs headless in this process, in real time, and the client in
+    another; both play random input. Returns the host's and client's
+    traffic summaries after checking the client ended up with the state
+    the host sent it.
+    """
+    ai_game = AlienInvasion(headless=True)
+    host = NetHost(ai_game, port=0, address='127.0.0.1')
+    rng = random.Random(seed)
+
+    context = multiprocessing.get_context('spawn')
+    pipe, child_pipe = context.Pipe()
+    process = context.Process(target=_loopback_client,
+        args=(host.port, rng.getrandbits(32), child_pipe), daemon=True)
+    process.start()
+    deadline = perf_counter() + 30
+    while host.client is None:
+        if perf_counter() > deadline:
+            raise RuntimeError("The loopback client never joined")
+        host.receive()
+        sleep(0.01)
+
+    ai_game.new_game(difficulty, rng.getrandbits(32))
+    dt = ai_game.timestep.dt
+    start = perf_counter()
+    for tick in range(round(seconds * ai_game.settings.tick_rate)):
+        host.receive()
+        began = perf_counter_ns()
+        if not ai_game.step(rng.choice(ACTIONS)):
+            ai_game.new_game(difficulty, rng.getrandbits(32))
+        host.stepped(perf_counter_ns() - began)
+        wait = start + (tick + 1) * dt - perf_counter()
+        if wait > 0:
+            sleep(wait)
+    host.close()
+
+    tick, score, count, bullets, client_summary = pipe.recv()
+    process.join()
+    expected = host.sent.get(tick)
+    if expected != (score, count, bullets):
+        raise RuntimeError(f"Client state {(score, count, bullets)} at tick "
+            f"{tick} doesn't match the host's {expected}")
+    return host.stats, client_summary
+
+
+def main():
+    """Host, join or test a two-player game."""
+    difficulties = tuple(DifficultyBook())
+    parser = argparse.ArgumentParser(
+        description='Play Alien Invasion for two over the network.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    host_parser = commands.add_parser('host', help='run the game for two')
+    host_parser.add_argument('--port', type=int, default=None)
+    join_parser = commands.add_parser('join', help="join a host's game")
+    join_parser.add_argument('address')
+    join_parser.add_argument('--port', type=int, default=None)
+    test_parser = commands.add_parser('loopback',
+        help='play host and client headless over 127.0.0.1 and report')
+    test_parser.add_argument('--difficulty', default='normal',
+        choices=difficulties)
+    test_parser.add_argument('--seconds', type=float, default=10.0)
+    test_parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == 'host':
+        NetHost(AlienInvasion(), args.port).run()
+    elif args.command == 'join':
+        NetClient(AlienInvasion(), args.address, args.port).run()
+    else:
+        host_stats, client_summary = loopback(args.difficulty, args.seconds,
+            args.seed)
+        print(host_stats.report('host'))
+        print(f"client: {client_summary['snapshots']:,} snapshots applied, "
+            f"{client_summary['mean_snapshot_ms']:.3f} ms each to decode, "
+            f"{client_summary['sent_bytes']:,} bytes of input sent")
+        print("OK: client state matches the host's")
+
+
+if __name__ == '__main__':
+    main()
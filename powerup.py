@@ -11,9 +11,10 @@ class PowerUp(Sprite):
         self.screen = ai_game.screen
         self.settings = ai_game.settings
 
-        # Load the power-up image and set its rect attribute.
-        self.image = pygame.image.load('images/powerup_t60x60.png')
-        self.rect = self.image.get_rect()
+        # Find the power-up image in the atlas and set its rect attribute.
+        self.atlas, self.area = ai_game.assets.region(
+            'images/powerup_t60x60.png')
+        self.rect = pygame.Rect((0, 0), self.area.size)
 
         # Start each new power-up near the top left of the screen.
         self.rect.x = self.rect.width
@@ -0,0 +1,91 @@
+# Part of Alien Invasion game. Presenters that put the logical frame in a
+# window.
+#
+# The game always draws at the logical size from Settings, onto the
+# presenter's screen surface. A presenter owns the window and decides how
+# that surface reaches it, so a fullscreen or high-DPI window costs no more
+# fill and blit work than the 1200x800 one.
+
+import pygame
+from pygame._sdl2.video import Window, Renderer, Texture
+
+class SurfacePresenter:
+    """A class to present through the display.set_mode() surface.
+
+    Windowed, the display surface is the logical surface, so presenting is
+    a plain flip and the window is always the logical size. Fullscreen,
+    pygame's SCALED mode stretches it on the GPU and maps mouse positions
+    back to logical coordinates.
+    """
+
+    def __init__(self, size, title, fullscreen=False, window_size=None,
+            vsync=False):
+        """Open the window with a size logical surface.
+
+        window_size is ignored, and vsync only works fullscreen.
+        """
+        if fullscreen:
+            self.screen = pygame.display.set_mode(size,
+                pygame.FULLSCREEN | pygame.SCALED, vsync=int(vsync))
+        else:
+            self.screen = pygame.display.set_mode(size)
+        pygame.display.set_caption(title)
+
+    def present(self, rects=None):
+        """Show the frame, or only rects of it if given."""
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+    def report(self):
+        """Return a one-line summary of the presenter."""
+        width, height = self.screen.get_size()
+        return f"surface presenter: {width}x{height} display surface"
+
+
+class TexturePresenter:
+    """A class to present through an SDL Renderer and a streaming Texture.
+
+    The logical surface is a plain Surface. Each frame the changed part of
+    it is uploaded to a texture the size of the logical screen, and the
+    renderer scales that to the window, letterboxed to keep the aspect
+    ratio. Mouse positions come back in logical coordinates. Set
+    SDL_RENDER_DRIVER=software to use SDL's software renderer.
+    """
+
+    def __init__(self, size, title, fullscreen=False, window_size=None,
+            vsync=False):
+        """Open a window_size window (size if None) with a size frame."""
+        self.window = Window(title, size=window_size or size,
+            fullscreen_desktop=fullscreen, allow_highdpi=True)
+        self.renderer = Renderer(self.window, vsync=vsync)
+        self.renderer.logical_size = size
+        self.texture = Texture(self.renderer, size, streaming=True)
+        self.screen = pygame.Surface(size)
+        self.uploaded = 0
+
+    def present(self, rects=None):
+        """Upload the frame, or only rects of it, and show it scaled."""
+        if rects is None:
+            self.texture.update(self.screen)
+            self.uploaded += self.screen.get_width() * self.screen.get_height()
+        else:
+            for rect in rects:
+                if rect.width and rect.height:
+                    self.texture.update(self.screen.subsurface(rect), rect)
+                    self.uploaded += rect.width * rect.height
+        self.renderer.clear()
+        self.texture.draw()
+        self.renderer.present()
+
+    def report(self):
+        """Return a one-line summary of the presenter."""
+        width, height = self.screen.get_size()
+        window_width, window_height = self.window.size
+        return (f"texture presenter: {width}x{height} frame scaled to "
+            f"{window_width}x{window_height} window, "
+            f"{self.uploaded:,} pixels uploaded")
+
+
+PRESENTERS = {'surface': SurfacePresenter, 'texture': TexturePresenter}
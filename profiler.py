@@ -0,0 +1,197 @@
+# Part of Alien Invasion game. Per-phase frame timing, overlay and export.
+
+import csv
+import json
+from array import array
+from time import perf_counter_ns
+
+import pygame
+
+from text import GlyphAtlas
+
+PHASES = ('events', 'ship', 'bullets', 'aliens', 'powerups', 'screen', 'flip')
+EVENTS, SHIP, BULLETS, ALIENS, POWERUPS, SCREEN, FLIP = range(len(PHASES))
+PHASE_COLORS = ((120, 120, 120), (60, 110, 220), (60, 60, 60),
+    (0, 180, 0), (220, 160, 0), (200, 60, 200), (220, 50, 50))
+
+# Marks log the start of a frame with this phase number.
+FRAME_START = -1
+
+def _ignore(*args):
+    """Stand in for the profiler's methods while it is disabled."""
+
+
+class FrameProfiler:
+    """A class to time each phase of the main loop into ring buffers.
+
+    mark(phase) charges the time since the previous mark to phase. Each
+    frame's per-phase totals go into one ring buffer and every raw mark into
+    another, for the trace export. While disabled, the recording methods
+    are swapped for a function that does nothing, so the calls can stay in
+    the loop.
+    """
+
+    def __init__(self, enabled=False, frames=600, marks=65536):
+        """Allocate the ring buffers for frames frames and marks marks."""
+        self.frames = frames
+        self.frame_ns = array('q', bytes(8 * frames))
+        self.phase_ns = array('q', bytes(8 * frames * len(PHASES)))
+        self.frame = 0
+        self.count = 0
+
+        self.marks = marks
+        self.mark_phase = array('b', bytes(marks))
+        self.mark_ns = array('q', bytes(8 * marks))
+        self.mark_index = 0
+        self.mark_count = 0
+
+        self.start = self.last = 0
+        self.set_enabled(enabled)
+
+    def set_enabled(self, enabled):
+        """Turn recording on or off.
+
+        Turning it on takes effect at the next begin_frame(), so a frame
+        that is already under way isn't recorded from a stale start time.
+        """
+        self.enabled = enabled
+        self.begin_frame = self._resume if enabled else _ignore
+        self.mark = _ignore
+        self.end_frame = _ignore
+
+    def _resume(self):
+        """Start recording, beginning with this frame."""
+        self.begin_frame = self._begin_frame
+        self.mark = self._mark
+        self.end_frame = self._end_frame
+        self._begin_frame()
+
+    def _log(self, phase, now):
+        """Append a raw mark to the mark ring."""
+        index = self.mark_index
+        self.mark_phase[index] = phase
+        self.mark_ns[index] = now
+        self.mark_index = (index + 1) % self.marks
+        self.mark_count = min(self.mark_count + 1, self.marks)
+
+    def _begin_frame(self):
+        """Start timing a new frame."""
+        self.start = self.last = perf_counter_ns()
+        row = self.frame * len(PHASES)
+        for phase in range(len(PHASES)):
+            self.phase_ns[row + phase] = 0
+        self._log(FRAME_START, self.start)
+
+    def _mark(self, phase):
+        """Charge the time since the last mark to phase."""
+        now = perf_counter_ns()
+        self.phase_ns[self.frame * len(PHASES) + phase] += now - self.last
+        self.last = now
+        self._log(phase, now)
+
+    def _end_frame(self):
+        """Finish the frame and move on to the next ring slot."""
+        self.frame_ns[self.frame] = self.last - self.start
+        self.frame = (self.frame + 1) % self.frames
+        self.count = min(self.count + 1, self.frames)
+
+    def _recent(self):
+        """Return the ring slots of recorded frames, oldest first."""
+        first = (self.frame - self.count) % self.frames
+        return [(first + i) % self.frames for i in range(self.count)]
+
+    def percentile(self, fraction):
+        """Return the given percentile of frame time, in milliseconds."""
+        if not self.count:
+            return 0.0
+        times = sorted(self.frame_ns[slot] for slot in self._recent())
+        return times[min(int(fraction * len(times)), len(times) - 1)] / 1e6
+
+    def phase_means(self):
+        """Return the mean time per frame of each phase, in milliseconds."""
+        if not self.count:
+            return [0.0] * len(PHASES)
+        totals = [0] * len(PHASES)
+        for slot in self._recent():
+            row = slot * len(PHASES)
+            for phase in range(len(PHASES)):
+                totals[phase] += self.phase_ns[row + phase]
+        return [total / self.count / 1e6 for total in totals]
+
+    def last_frame_ms(self):
+        """Return the time of the most recent frame, in milliseconds."""
+        if not self.count:
+            return 0.0
+        return self.frame_ns[(self.frame - 1) % self.frames] / 1e6
+
+    def export(self, path):
+        """Write the recorded data as Chrome trace JSON (.json) or CSV."""
+        if path.endswith('.json'):
+            self._export_trace(path)
+        else:
+            self._export_csv(path)
+
+    def _export_trace(self, path):
+        """Write every logged mark as a Chrome trace 'complete' event."""
+        first = (self.mark_index - self.mark_count) % self.marks
+        events = []
+        previous = None
+        for i in range(self.mark_count):
+            index = (first + i) % self.marks
+            phase, now = self.mark_phase[index], self.mark_ns[index]
+            if phase != FRAME_START and previous is not None:
+                events.append({'name': PHASES[phase], 'ph': 'X', 'pid': 1,
+                    'tid': 1, 'ts': previous / 1000,
+                    'dur': (now - previous) / 1000})
+            previous = now
+        with open(path, 'w') as file_object:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'},
+                file_object)
+
+    def _export_csv(self, path):
+        """Write one row per recorded frame with per-phase times in ns."""
+        with open(path, 'w', newline='') as file_object:
+            writer = csv.writer(file_object)
+            writer.writerow(('frame', 'total_ns') + PHASES)
+            for number, slot in enumerate(self._recent()):
+                row = slot * len(PHASES)
+                writer.writerow([number, self.frame_ns[slot]] +
+                    list(self.phase_ns[row:row + len(PHASES)]))
+
+
+class ProfilerOverlay:
+    """A class to show frame timing and per-phase bars on screen."""
+
+    def __init__(self, profiler, font, text_color, bg_color, topleft=(10, 70)):
+        """Prepare the glyphs and layout for the overlay."""
+        self.profiler = profiler
+        self.text = GlyphAtlas(font, text_color, bg_color,
+            glyphs='0123456789.:% abcdefghijklmnopqrstuvwxyz',
+            labels=PHASES, cache_size=32)
+        self.left, self.top = topleft
+        self.line_height = self.text.height + 2
+        self.label_width = max(self.text.render(phase).get_width()
+            for phase in PHASES) + 8
+        self.px_per_ms = 100
+
+    def draw_items(self, fps=0.0):
+        """Return draw list items for the overlay."""
+        profiler = self.profiler
+        lines = [f"frame {profiler.last_frame_ms():.2f} ms  "
+            f"p50 {profiler.percentile(0.5):.2f}  "
+            f"p99 {profiler.percentile(0.99):.2f}  fps {fps:.0f}"]
+        items = []
+        y = self.top
+        for line in lines:
+            image = self.text.render(line)
+            items.append((image, (self.left, y)))
+            y += self.line_height
+
+        for phase, mean in enumerate(profiler.phase_means()):
+            items.append((self.text.render(PHASES[phase]), (self.left, y)))
+            width = max(1, round(mean * self.px_per_ms))
+            items.append((PHASE_COLORS[phase], pygame.Rect(
+                self.left + self.label_width, y + 2, width,
+                self.line_height - 4)))
+            y += self.line_height
+        return items
@@ -0,0 +1,165 @@
+# Part of Alien Invasion game. Renderers that put a frame's draw list on screen.
+#
+# Renderers draw onto a presenter's logical screen surface and tell it which
+# parts to show; see presenter.py.
+#
+# A draw list is a list of (source, dest) pairs in back-to-front order.
+# source is either a Surface, blitted with its top-left at dest, or a color,
+# drawn as a filled Rect dest. A Surface item may carry a third value, the
+# area of the source to draw, for sprites that live in a texture atlas.
+#
+# A Surface that is changed in place while it is being drawn from, such as
+# the fleet's layer, must be passed to touch() after each change, so the
+# dirty-rect renderer knows its items changed even where their rects didn't.
+
+import weakref
+
+import pygame
+
+# How many times each touched Surface has been changed in place.
+_versions = weakref.WeakKeyDictionary()
+
+def touch(surface):
+    """Note that surface's pixels changed, so anything drawn from it is redrawn."""
+    _versions[surface] = _versions.get(surface, 0) + 1
+
+
+def draw_items(surface, items):
+    """Draw a draw list onto surface, batching runs of images into blits()."""
+    images = []
+    for item in items:
+        if isinstance(item[0], pygame.Surface):
+            images.append(item)
+        else:
+            if images:
+                surface.blits(images, False)
+                images = []
+            pygame.draw.rect(surface, item[0], item[1])
+    if images:
+        surface.blits(images, False)
+
+
+class FullRenderer:
+    """A class to clear and redraw the whole screen every frame."""
+
+    def __init__(self, presenter, bg_color):
+        """Initialize the renderer for presenter's screen."""
+        self.presenter = presenter
+        self.screen = presenter.screen
+        self.bg_color = bg_color
+
+    def draw(self, items):
+        """Draw a whole frame."""
+        self.screen.fill(self.bg_color)
+        draw_items(self.screen, items)
+
+    def present(self):
+        """Show the whole frame."""
+        self.presenter.present()
+
+    def report(self):
+        """Return a one-line summary of the renderer's work."""
+        return "full renderer: every pixel redrawn every frame"
+
+
+class DirtyRenderer:
+    """A class to redraw and update only the parts of the screen that changed.
+
+    An item is unchanged if the same source is drawn at the same rect as in
+    the previous frame, and the source hasn't been touched since. Every
+    rect an item left or arrived at is cleared and redrawn, clipped, from
+    the whole draw list, then the presenter shows only those rects instead
+    of the full screen.
+    """
+
+    def __init__(self, presenter, bg_color):
+        """Initialize the renderer; the first frame is drawn in full."""
+        self.presenter = presenter
+        self.screen = presenter.screen
+        self.bg_color = bg_color
+        self.screen_rect = self.screen.get_rect()
+        self.previous = None
+        self.dirty = []
+
+        # Fill-rate statistics.
+        self.frames = 0
+        self.pixels_updated = 0
+        self.last_savings = 0.0
+
+    def draw(self, items):
+        """Draw the changed parts of a frame."""
+        rects = []
+        current = {}
+        versions = _versions
+        for item in items:
+            source, dest = item[0], item[1]
+            if isinstance(source, pygame.Surface):
+                if len(item) > 2:
+                    # Part of an atlas: the area says which image it is.
+                    area = item[2]
+                    rect = pygame.Rect(dest[0], dest[1], area[2], area[3])
+                    current[(source, tuple(rect), tuple(area))] = rect
+                else:
+                    rect = pygame.Rect(dest[0], dest[1], *source.get_size())
+                    current[(source, tuple(rect), versions.get(source))] = rect
+            else:
+                rect = pygame.Rect(dest)
+                current[(source, tuple(rect))] = rect
+            rects.append(rect)
+
+        if self.previous is None:
+            self.screen.fill(self.bg_color)
+            draw_items(self.screen, items)
+            dirty = [self.screen_rect]
+        else:
+            previous = self.previous
+            dirty = [rect.clip(self.screen_rect)
+                for key, rect in previous.items() if key not in current]
+            dirty += [rect.clip(self.screen_rect)
+                for key, rect in current.items() if key not in previous]
+            self._redraw(items, rects, dirty)
+        self.previous = current
+        self.dirty = dirty
+        self._count(dirty)
+
+    def present(self):
+        """Show the rects the last frame changed."""
+        self.presenter.present(self.dirty)
+
+    def _redraw(self, items, rects, dirty):
+        """Clear each dirty rect and redraw the items that overlap it."""
+        screen = self.screen
+        for area in dirty:
+            screen.set_clip(area)
+            screen.fill(self.bg_color, area)
+            draw_items(screen, [items[i] for i in area.collidelistall(rects)])
+        screen.set_clip(None)
+
+    def _count(self, dirty):
+        """Record how much of the screen this frame had to touch."""
+        screen_area = self.screen_rect.width * self.screen_rect.height
+        area = min(sum(rect.width * rect.height for rect in dirty), screen_area)
+        self.frames += 1
+        self.pixels_updated += area
+        self.last_savings = 1 - area / screen_area
+
+    def invalidate(self):
+        """Force the next frame to be drawn in full."""
+        self.previous = None
+
+    @property
+    def savings(self):
+        """Average fraction of screen pixels not redrawn per frame."""
+        if not self.frames:
+            return 0.0
+        screen_area = self.screen_rect.width * self.screen_rect.height
+        return 1 - self.pixels_updated / (self.frames * screen_area)
+
+    def report(self):
+        """Return a one-line summary of the fill-rate savings."""
+        return (f"dirty renderer: {self.frames} frames, "
+            f"{self.savings:.1%} of pixels skipped on average, "
+            f"{self.last_savings:.1%} last frame")
+
+
+RENDERERS = {'full': FullRenderer, 'dirty': DirtyRenderer}
@@ -0,0 +1,286 @@
+# Part of Alien Invasion game. Record games as compact input logs and replay them.
+#
+# Example: python replay.py files/replays/20261018-120000-1234.air --realtime
+#
+# A replay file holds the RNG seed, difficulty and starting speeds, then the
+# input for every simulation step, run-length encoded as varints, then the
+# final tick count, score and level used to verify a replay.
+
+import argparse
+import os
+import struct
+from datetime import datetime
+from time import perf_counter
+
+from timestep import FixedTimestep
+
+MAGIC = b'AIRP'
+VERSION = 3
+
+# Dynamic settings captured at the start of a game, packed as doubles.
+START_SETTINGS = ('ship_speed', 'bullet_speed', 'alien_speed',
+    'alien_points', 'fleet_direction')
+
+# Bits of a step's input state; the fire count sits above them.
+LEFT, RIGHT, FIRE_SHIFT = 1, 2, 2
+
+def write_varint(buffer, value):
+    """Append a non-negative int to buffer as a little-endian base-128 varint."""
+    while value >= 0x80:
+        buffer.append((value & 0x7f) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, offset):
+    """Read a varint from data at offset; return (value, new offset)."""
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class Replay:
+    """A class to hold one recorded game."""
+
+    def __init__(self, seed, difficulty, tick_rate, start_settings,
+            runs=None, ticks=0, score=0, level=1):
+        """Store the game's starting conditions and its input runs."""
+        self.seed = seed
+        self.difficulty = difficulty
+        self.tick_rate = tick_rate
+        self.start_settings = start_settings
+        self.runs = runs if runs is not None else []
+        self.ticks = ticks
+        self.score = score
+        self.level = level
+
+    def inputs(self):
+        """Yield the input state of each step in order."""
+        for count, state in self.runs:
+            for _ in range(count):
+                yield state
+
+    def to_bytes(self):
+        """Pack the replay into its binary form."""
+        buffer = bytearray(MAGIC)
+        buffer.append(VERSION)
+        write_varint(buffer, self.seed)
+        difficulty = self.difficulty.encode()
+        write_varint(buffer, len(difficulty))
+        buffer += difficulty
+        write_varint(buffer, self.tick_rate)
+        buffer += struct.pack(f'<{len(START_SETTINGS)}d', *self.start_settings)
+
+        write_varint(buffer, len(self.runs))
+        for count, state in self.runs:
+            write_varint(buffer, count)
+            write_varint(buffer, state)
+
+        write_varint(buffer, self.ticks)
+        write_varint(buffer, self.score)
+        write_varint(buffer, self.level)
+        return bytes(buffer)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Unpack a replay from its binary form."""
+        if data[:4] != MAGIC or data[4] != VERSION:
+            raise ValueError("Not an Alien Invasion replay (or a newer version).")
+        offset = 5
+        seed, offset = read_varint(data, offset)
+        length, offset = read_varint(data, offset)
+        difficulty = data[offset:offset + length].decode()
+        offset += length
+        tick_rate, offset = read_varint(data, offset)
+        start_format = f'<{len(START_SETTINGS)}d'
+        start_settings = struct.unpack_from(start_format, data, offset)
+        offset += struct.calcsize(start_format)
+
+        run_count, offset = read_varint(data, offset)
+        runs = []
+        for _ in range(run_count):
+            count, offset = read_varint(data, offset)
+            state, offset = read_varint(data, offset)
+            runs.append((count, state))
+
+        ticks, offset = read_varint(data, offset)
+        score, offset = read_varint(data, offset)
+        level, offset = read_varint(data, offset)
+        return cls(seed, difficulty, tick_rate, start_settings, runs, ticks,
+            score, level)
+
+    def save(self, path):
+        """Write the replay to path."""
+        with open(path, 'wb') as file_object:
+            file_object.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        """Read a replay from path."""
+        with open(path, 'rb') as file_object:
+            return cls.from_bytes(file_object.read())
+
+
+class Recorder:
+    """A class to capture a game's input one simulation step at a time."""
+
+    def __init__(self, ai_game, directory=None):
+        """Prepare to record ai_game; finished games are saved in directory."""
+        self.ai_game = ai_game
+        self.directory = directory
+        self.replay = None
+        self.fires = 0
+        self.last_path = None
+
+    def start(self, seed):
+        """Begin a new recording for a game started with seed."""
+        settings = self.ai_game.settings
+        self.replay = Replay(seed, settings.difficulty, settings.tick_rate,
+            tuple(float(getattr(settings, name)) for name in START_SETTINGS))
+        self.fires = 0
+
+    def fire(self):
+        """Count a fire attempt; it belongs to the next step."""
+        if self.replay is not None:
+            self.fires += 1
+
+    def record_step(self, moving_left, moving_right):
+        """Store the input for the step about to run."""
+        replay = self.replay
+        if replay is None:
+            return
+        state = ((LEFT if moving_left else 0) | (RIGHT if moving_right else 0)
+            | self.fires << FIRE_SHIFT)
+        self.fires = 0
+        runs = replay.runs
+        if runs and runs[-1][1] == state:
+            runs[-1] = (runs[-1][0] + 1, state)
+        else:
+            runs.append((1, state))
+        replay.ticks += 1
+
+    def discard(self):
+        """Stop recording without keeping the replay."""
+        self.replay = None
+        self.fires = 0
+
+    def finish(self):
+        """End the recording, save it if there is a directory, and return it."""
+        replay, self.replay = self.replay, None
+        if replay is None:
+            return None
+        stats = self.ai_game.stats
+        replay.score, replay.level = int(stats.score), stats.level
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = os.path.join(self.directory,
+                f"{datetime.now():%Y%m%d-%H%M%S}-{replay.seed}")
+            # Games with the same seed can finish in the same second (or in
+            # another process); the file is created exclusively, and a
+            # taken name gets a counter.
+            data, path, count = replay.to_bytes(), f"{stamp}.air", 1
+            while True:
+                try:
+                    with open(path, 'xb') as file_object:
+                        file_object.write(data)
+                    break
+                except FileExistsError:
+                    count += 1
+                    path = f"{stamp}-{count}.air"
+            self.last_path = path
+        return replay
+
+
+class Replayer:
+    """A class to re-simulate a recorded game step by step."""
+
+    def __init__(self, replay, ai_game):
+        """Prepare to replay replay on ai_game."""
+        self.replay = replay
+        self.ai_game = ai_game
+
+    def start(self):
+        """Put the game in the exact state the recording started from."""
+        ai_game = self.ai_game
+        ai_game.settings.initialize_dynamic_settings(self.replay.difficulty)
+        for name, value in zip(START_SETTINGS, self.replay.start_settings):
+            if name in ('alien_points', 'fleet_direction'):
+                value = int(value)
+            setattr(ai_game.settings, name, value)
+        ai_game._start_game(self.replay.seed)
+
+    def steps(self):
+        """Run the recorded steps, yielding after each one."""
+        ai_game = self.ai_game
+        ship = ai_game.ship
+        dt = ai_game.timestep.dt
+        for state in self.replay.inputs():
+            for _ in range(state >> FIRE_SHIFT):
+                ai_game._fire_bullet()
+            ship.moving_left = bool(state & LEFT)
+            ship.moving_right = bool(state & RIGHT)
+            ai_game._update_game(dt)
+            yield
+
+    def verify(self):
+        """Return a list of differences between the replay and the recording."""
+        ai_game, replay = self.ai_game, self.replay
+        problems = []
+        if ai_game.timestep.ticks != replay.ticks:
+            problems.append(f"ticks {ai_game.timestep.ticks} != {replay.ticks}")
+        if int(ai_game.stats.score) != replay.score:
+            problems.append(f"score {int(ai_game.stats.score)} != {replay.score}")
+        if ai_game.stats.level != replay.level:
+            problems.append(f"level {ai_game.stats.level} != {replay.level}")
+        return problems
+
+
+def main():
+    """Replay a recorded game and check it ends the way it was recorded."""
+    parser = argparse.ArgumentParser(
+        description='Replay a recorded Alien Invasion game.')
+    parser.add_argument('path')
+    parser.add_argument('--realtime', action='store_true',
+        help='draw the replay at normal speed instead of as fast as possible')
+    args = parser.parse_args()
+
+    from alien_invasion import AlienInvasion
+
+    replay = Replay.load(args.path)
+    ai_game = AlienInvasion(headless=not args.realtime)
+    ai_game.settings.tick_rate = replay.tick_rate
+    ai_game.timestep = FixedTimestep(replay.tick_rate,
+        ai_game.settings.max_frame_time)
+    replayer = Replayer(replay, ai_game)
+    replayer.start()
+
+    start = perf_counter()
+    if args.realtime:
+        import pygame
+        for _ in replayer.steps():
+            pygame.event.pump()
+            ai_game._update_screen()
+            ai_game.renderer.present()
+            ai_game.clock.tick(replay.tick_rate)
+    else:
+        for _ in replayer.steps():
+            pass
+    elapsed = perf_counter() - start
+
+    print(f"{replay.ticks:,} steps replayed in {elapsed:.2f}s "
+        f"({replay.ticks / elapsed:,.0f} steps/s), "
+        f"file {os.path.getsize(args.path):,} bytes")
+    problems = replayer.verify()
+    if problems:
+        print("MISMATCH: " + ", ".join(problems))
+        raise SystemExit(1)
+    print(f"OK: score {replay.score:,}, level {replay.level}")
+
+
+if __name__ == '__main__':
+    main()
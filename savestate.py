@@ -0,0 +1,298 @@
+# Part of Alien Invasion game. Pack a game in progress into bytes and put it
+# back, for saving on quit, resuming on launch and rewinding.
+#
+# A save state holds everything a step reads: the level, score and ships, the
+# game state and its timer, the power up timers, the ship, every bullet in
+# order, the power up on screen, the fleet and the random generator. Restored,
+# the game carries on exactly as it would have. A two-player game's partner
+# ship isn't saved.
+#
+# The fleet is stored as the formation's name, a bit per slot for the aliens
+# still alive and, for those, how far each one has drifted from where the
+# fleet's offset puts it. The drift is rounding error, usually zero, so it
+# compresses to almost nothing.
+
+import os
+import struct
+import tempfile
+import zlib
+from array import array
+from collections import deque
+from time import perf_counter_ns
+
+import numpy as np
+import pygame
+
+from game_state import PLAYING, RESPAWN_PAUSE, POWERUP_FLASH, GAME_OVER
+from powerup import PowerUp
+
+MAGIC = b'AISV'
+VERSION = 1
+
+STATES = (PLAYING, RESPAWN_PAUSE, POWERUP_FLASH, GAME_OVER)
+
+# Magic and version, seed and ticks, timestep accumulator; score, level,
+# ships left, game active; state and when it ends (-1 for never); level
+# index, fleet direction; power up active, start time, counter, spawned
+# this level; ship x and previous x; fleet offsets, previous x offset and
+# bounds; fleet slots, bullets, power ups; random generator version and
+# the gauss value it holds (flag, value).
+HEADER = struct.Struct('<4sBQQdqIBBBqHbBqHBdddddddddIHBBBd')
+
+BULLET = np.dtype([('x', '<i2'), ('top', '<i2'), ('y', '<f8'),
+    ('prev_y', '<f8'), ('powerup', 'u1')])
+POWERUP = np.dtype([('x', '<i2'), ('y', '<i2')])
+
+# Words in the Mersenne Twister state, with its position.
+RANDOM_WORDS = 625
+
+def _pack_name(name):
+    """Return name as a length-prefixed string."""
+    data = name.encode()
+    return bytes((len(data),)) + data
+
+
+def _unpack_name(data, offset):
+    """Read a length-prefixed string at offset; return (name, new offset)."""
+    length = data[offset]
+    end = offset + 1 + length
+    return data[offset + 1:end].decode(), end
+
+
+def pack_game(ai_game):
+    """Return the game as it is now, packed into bytes."""
+    settings, stats, fleet = ai_game.settings, ai_game.stats, ai_game.aliens
+    state, timestep, ship = ai_game.state, ai_game.timestep, ai_game.ship
+    version, words, gauss = ai_game.random.getstate()
+
+    # Drift of each live alien from its formation position plus the offset.
+    alive = fleet.alive
+    if fleet.formation:
+        formation = ai_game._formation(fleet.formation)
+        drift_x = fleet.x[alive] - (formation.x[alive] + fleet.offset_x)
+        drift_y = fleet.y[alive] - (formation.y[alive] + fleet.offset_y)
+    else:
+        drift_x = drift_y = np.zeros(0)
+
+    bullets = np.array([(bullet.rect.x, bullet.rect.y, bullet.y,
+        bullet.prev_y, bullet.powerup) for bullet in ai_game.bullets],
+        dtype=BULLET)
+    powerups = np.array([powerup.rect.topleft for powerup in
+        ai_game.powerups], dtype=POWERUP)
+
+    header = HEADER.pack(MAGIC, VERSION, ai_game.seed or 0, timestep.ticks,
+        timestep.accumulator, int(stats.score), stats.level, stats.ships_left,
+        stats.game_active, STATES.index(state.state),
+        -1 if state.ends_at is None else state.ends_at,
+        settings.level_index, settings.fleet_direction,
+        ai_game.powerup_active, ai_game.powerup_start_time,
+        ai_game.powerup_counter, ai_game.powerup_spawned_this_level,
+        ship.x, ship.prev_x, fleet.offset_x, fleet.offset_y,
+        fleet.prev_offset_x, fleet.left, fleet.top, fleet.right, fleet.bottom,
+        len(alive), len(bullets), len(powerups),
+        version, gauss is not None, gauss or 0.0)
+    body = (array('I', words).tobytes() + np.packbits(alive).tobytes() +
+        drift_x.tobytes() + drift_y.tobytes() + bullets.tobytes() +
+        powerups.tobytes())
+    return (header + _pack_name(settings.difficulty) +
+        _pack_name(fleet.formation or '') + zlib.compress(body, 1))
+
+
+def unpack_game(ai_game, data):
+    """Put the game back the way pack_game() found it.
+
+    The replay being recorded is dropped, as it can no longer be played
+    back from its seed.
+    """
+    if len(data) < HEADER.size or data[:4] != MAGIC or data[4] != VERSION:
+        raise ValueError("Not an Alien Invasion save state (or a newer version).")
+    try:
+        _unpack_game(ai_game, data)
+    except (IndexError, struct.error, zlib.error) as error:
+        raise ValueError(f"Damaged save state: {error}") from None
+
+
+def _unpack_game(ai_game, data):
+    """Restore a save state whose header has been checked."""
+    (_, _, seed, ticks, accumulator, score, level, ships_left, active,
+        state_index, ends_at, level_index, fleet_direction, powerup_active,
+        powerup_start_time, powerup_counter, powerup_spawned, ship_x,
+        ship_prev_x, offset_x, offset_y, prev_offset_x, left, top, right,
+        bottom, slots, bullet_count, powerup_count, version, has_gauss,
+        gauss) = HEADER.unpack_from(data)
+    difficulty, offset = _unpack_name(data, HEADER.size)
+    formation, offset = _unpack_name(data, offset)
+    body = zlib.decompress(data[offset:])
+
+    settings, stats, fleet = ai_game.settings, ai_game.stats, ai_game.aliens
+    settings.initialize_dynamic_settings(difficulty)
+    ai_game._prepare_difficulty()
+    settings.level_index = level_index
+    settings._apply_level()
+    settings.fleet_direction = fleet_direction
+
+    offset = 4 * RANDOM_WORDS
+    words = array('I', body[:offset])
+    ai_game.seed = seed
+    ai_game.random.setstate((version, tuple(words),
+        gauss if has_gauss else None))
+    timestep = ai_game.timestep
+    timestep.ticks, timestep.accumulator = ticks, accumulator
+    ai_game.state.enter(STATES[state_index])
+    ai_game.state.ends_at = None if ends_at < 0 else ends_at
+    ai_game.recorder.discard()
+
+    stats.score, stats.level, stats.ships_left = score, level, ships_left
+    stats.game_active = bool(active)
+    ai_game.sb.prep_score()
+    ai_game.sb.prep_level()
+    ai_game.sb.prep_ships()
+    ai_game.sb.check_high_score()
+
+    ai_game.powerup_active = bool(powerup_active)
+    ai_game.powerup_start_time = powerup_start_time
+    ai_game.powerup_counter = powerup_counter
+    ai_game.powerup_spawned_this_level = bool(powerup_spawned)
+
+    ship = ai_game.ship
+    ship.x, ship.prev_x = ship_x, ship_prev_x
+    ship.rect.x = ship.x
+
+    # The fleet: spawn the formation, kill the dead, then move the rest to
+    # exactly where they were.
+    bits = (slots + 7) // 8
+    alive = np.unpackbits(np.frombuffer(body, np.uint8, bits, offset),
+        count=slots).astype(bool)
+    offset += bits
+    live = int(alive.sum())
+    drift_x = np.frombuffer(body, float, live, offset)
+    drift_y = np.frombuffer(body, float, live, offset + 8 * live)
+    offset += 16 * live
+    if formation:
+        fleet.spawn_formation(ai_game._formation(formation))
+        dead = np.flatnonzero(fleet.alive & ~alive)
+        if len(dead):
+            fleet.kill(dead.tolist())
+        fleet.x += offset_x
+        fleet.x[alive] += drift_x
+        fleet.y += offset_y
+        fleet.y[alive] += drift_y
+        fleet.prev_x[:] = fleet.x - (offset_x - prev_offset_x)
+        fleet.offset_x, fleet.offset_y = offset_x, offset_y
+        fleet.prev_offset_x = prev_offset_x
+        fleet.left, fleet.top, fleet.right, fleet.bottom = (left, top, right,
+            bottom)
+
+    pool = ai_game.bullets
+    pool.empty()
+    pool.reserve(bullet_count)
+    for x, top, y, prev_y, powerup in np.frombuffer(body, BULLET,
+            bullet_count, offset).tolist():
+        bullet = pool.fire(pygame.Rect(x, top, 0, 0), bool(powerup))
+        bullet.rect.topleft = (x, top)
+        bullet.y, bullet.prev_y = y, prev_y
+    offset += BULLET.itemsize * bullet_count
+
+    ai_game.powerups.empty()
+    for x, y in np.frombuffer(body, POWERUP, powerup_count, offset).tolist():
+        powerup = PowerUp(ai_game)
+        powerup.rect.topleft = (x, y)
+        ai_game.powerups.add(powerup)
+
+
+def save_game(ai_game, path):
+    """Write the game to path; return (bytes written, seconds taken).
+
+    The state goes to a temporary file beside path and replaces it only
+    once it is all on disk, so a crash mid-write leaves the old save (or
+    none), never half of one.
+    """
+    start = perf_counter_ns()
+    data = pack_game(ai_game)
+    descriptor, temp_path = tempfile.mkstemp('.bin', 'tmp-',
+        os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(descriptor, 'wb') as file_object:
+            file_object.write(data)
+            file_object.flush()
+            os.fsync(file_object.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return len(data), (perf_counter_ns() - start) / 1e9
+
+
+def load_game(ai_game, path):
+    """Restore the game saved at path; return (bytes read, seconds taken)."""
+    start = perf_counter_ns()
+    with open(path, 'rb') as file_object:
+        data = file_object.read()
+    unpack_game(ai_game, data)
+    return len(data), (perf_counter_ns() - start) / 1e9
+
+
+class Rewind:
+    """A class to keep the last few seconds of a game as save states.
+
+    A state is packed every interval seconds of play, and the oldest is
+    dropped once there are enough to cover seconds. back() restores the
+    newest and forgets it, so pressing it again goes further back.
+    """
+
+    def __init__(self, ai_game, interval=1.0, seconds=10.0):
+        """Prepare to keep seconds of ai_game, a state every interval."""
+        self.ai_game = ai_game
+        self.every = max(1, ai_game.timestep.seconds_to_ticks(interval))
+        self.states = deque(maxlen=max(1, round(seconds / interval)))
+        self.last_tick = None
+
+        self.packed = 0
+        self.pack_ns = 0
+        self.pack_bytes = 0
+        self.rewinds = 0
+        self.unpack_ns = 0
+
+    def clear(self):
+        """Forget every state, as when a new game starts."""
+        self.states.clear()
+        self.last_tick = None
+
+    def update(self):
+        """Pack the game if it's being played and a state is due."""
+        ai_game = self.ai_game
+        ticks = ai_game.timestep.ticks
+        if not (ai_game.stats.game_active and ai_game.state.playing):
+            return
+        if self.last_tick is not None and ticks - self.last_tick < self.every:
+            return
+        start = perf_counter_ns()
+        data = pack_game(ai_game)
+        self.pack_ns += perf_counter_ns() - start
+        self.packed += 1
+        self.pack_bytes += len(data)
+        self.states.append(data)
+        self.last_tick = ticks
+
+    def back(self):
+        """Restore the newest state; return False if there is none."""
+        if not self.states:
+            return False
+        start = perf_counter_ns()
+        unpack_game(self.ai_game, self.states.pop())
+        self.unpack_ns += perf_counter_ns() - start
+        self.rewinds += 1
+        self.last_tick = self.ai_game.timestep.ticks
+        return True
+
+    def report(self):
+        """Return a one-line summary of the states packed and restored."""
+        if not self.packed:
+            return "rewind: nothing packed"
+        line = (f"rewind: {self.packed:,} states packed, "
+            f"{self.pack_bytes / self.packed:,.0f} bytes and "
+            f"{self.pack_ns / self.packed / 1e6:.2f} ms mean")
+        if self.rewinds:
+            line += (f", {self.rewinds:,} rewinds, "
+                f"{self.unpack_ns / self.rewinds / 1e6:.2f} ms mean")
+        return line
@@ -1,6 +1,6 @@
-import pygame.font
 from pygame.sprite import Group
 from ship import Ship
+from text import GlyphAtlas
 
 class Scoreboard:
 	"""A class to report scoring information."""
@@ -15,7 +15,11 @@ class Scoreboard:
 
 		# Font settings for scoring information.
 		self.text_color = (30, 30, 30)
-		self.font = pygame.font.SysFont(None, 48)
+		self.font = ai_game.assets.font(None, 48)
+
+		# Numbers are put together from digit and comma glyphs.
+		self.digits = GlyphAtlas(self.font, self.text_color,
+			self.settings.bg_color)
 
 		self.prep_images()
 
@@ -32,27 +36,27 @@ class Scoreboard:
 		rounded_score = round(self.stats.score, -1) # Passing a negative to round 
 		# will result in it rounding to the nearest 10, 100, 1000 etc. 
 		score_str = "{:,}".format(rounded_score) # String formatting directive {:,}
-		self.score_image = self.font.render(score_str, True,
-			self.text_color, self.settings.bg_color)
+		self.score_image = self.digits.render(score_str)
 
 		# Display the score at the top right of the screen.
 		self.score_rect = self.score_image.get_rect()
 		self.score_rect.right = self.screen_rect.right - 20
 		self.score_rect.top = 20
 
-	def show_score(self):
-		"""Draw scores, level and ships to the screen."""
-		self.screen.blit(self.score_image, self.score_rect)
-		self.screen.blit(self.high_score_image, self.high_score_rect)
-		self.screen.blit(self.level_image, self.level_rect)
-		self.ships.draw(self.screen)
+	def draw_items(self):
+		"""Return draw list items for scores, level and ships."""
+		items = [(self.score_image, self.score_rect),
+			(self.high_score_image, self.high_score_rect),
+			(self.level_image, self.level_rect)]
+		items += [(ship.atlas, ship.rect, ship.area)
+			for ship in self.ships.sprites()]
+		return items
 
 	def prep_high_score(self):
 		"""Turn the high score into a rendered image."""
 		high_score = round(self.stats.high_score, -1)
 		high_score_str = "{:,}".format(high_score)
-		self.high_score_image = self.font.render(high_score_str, True,
-			self.text_color, self.settings.bg_color)
+		self.high_score_image = self.digits.render(high_score_str)
 
 		# Center the high score at the top of the screen.
 		self.high_score_rect = self.high_score_image.get_rect()
@@ -68,8 +72,7 @@ class Scoreboard:
 	def prep_level(self):
 		"""Turn the level into a rendered image."""
 		level_str = str(self.stats.level)
-		self.level_image = self.font.render(level_str, True,
-			self.text_color, self.settings.bg_color)
+		self.level_image = self.digits.render(level_str)
 
 		# Position the level below the score.
 		self.level_rect = self.level_image.get_rect()
@@ -1,15 +1,72 @@
 # Setting class for Alien Invasion game. 
 
+from difficulty import DifficultyBook
+
 class Settings:
     """A class to store all settings for Alien Invasion."""
 
     def __init__(self):
         """initialize the game's static settings."""
-        # Screen settings
+        # Screen settings. The game always draws at screen_width x
+        # screen_height; the presenter scales that to the window.
         self.screen_width = 1200
         self.screen_height = 800
+        self.presenter = 'surface' # 'surface' uses display.set_mode(); 'texture' scales with an SDL Renderer.
+        self.fullscreen = False
+        self.window_size = None # Window (width, height) for the 'texture' presenter; None for the logical size.
+        self.vsync = False
+
+        # Input. 'events' follows key events once a frame; 'polled' reads the
+        # keyboard right before each simulation step.
+        self.input_mode = 'events'
         self.bg_color = (230, 230, 230) # Set the background color. (R, G, B). Range is 0 - 255 for each color.
 
+        # Timing settings. All speeds below are in pixels per second.
+        self.tick_rate = 120 # Simulation steps per second.
+        self.max_fps = 60 # Cap on frames drawn per second. 0 means uncapped.
+        self.max_frame_time = 0.25 # Longest frame (seconds) the simulation catches up on.
+        self.renderer = 'full' # 'full' redraws every frame; 'dirty' redraws only what changed.
+
+        # Pauses (seconds) after losing a ship and collecting a power up.
+        self.respawn_pause = 0.5
+        self.powerup_pause = 0.5
+        self.pause_banner_color = (255, 255, 255)
+
+        # Replays. Every game's input is recorded; set a directory to keep them.
+        self.replay_dir = None # e.g. 'files/replays'
+
+        # Saved games. Quitting mid-game saves it to save_path, and the next
+        # launch resumes it. Backspace rewinds to a state packed every
+        # rewind_interval seconds, up to rewind_seconds back.
+        self.save_path = 'files/savegame.bin' # None to record the score on quit instead.
+        self.rewind_interval = 1.0
+        self.rewind_seconds = 10.0
+
+        # Frame capture. F9 starts and stops recording presented frames; the
+        # writer runs in its own process, and frames it can't keep up with are
+        # dropped rather than waited for.
+        self.capture = False # Start recording as soon as the game opens.
+        self.capture_dir = 'files/captures' # Each recording gets a timestamped directory here.
+        self.capture_every = 1 # Record every Nth presented frame.
+        self.capture_format = 'png' # 'png' for a PNG sequence; 'raw' for one file of raw frames.
+        self.capture_slots = 8 # Frames that can wait for the writer.
+
+        # Sound. A small mixer buffer keeps shots from lagging behind the key
+        # press; each category gets its own channels.
+        self.audio_frequency = 44100
+        self.audio_buffer = 256 # Samples per mixer buffer; pygame's default is 512.
+        self.audio_channels = {'weapon': 4, 'impact': 2, 'ui': 2}
+        self.sound_min_interval_ms = 30 # Shortest gap before the same sound restarts.
+
+        # Two-player games over the network (netplay.py).
+        self.net_port = 5555
+        self.net_snapshot_rate = 60 # State snapshots per second sent to the client.
+        self.partner_offset = 120 # Where the second ship starts, right of centre.
+
+        # Profiling. F3 toggles the profiler and its overlay while playing.
+        self.profile = False
+        self.profile_export = None # 'profile.json' (Chrome trace) or 'profile.csv', written on exit.
+
         # Ship settings
         self.ship_limit = 3
 
@@ -17,66 +74,49 @@ class Settings:
         self.bullet_width = 3 # Original value is '3'. Alter for testing 
         self.bullet_height = 15
         self.bullet_color = (60, 60, 60)
-        self.bullets_allowed = 3
-        self.bullet_speed = 1
-
-        # Alien settings
-        self.fleet_drop_speed = 10
-        
-        # How quickly the game speeds up
-        self.speedup_scale = 1.1
-
-        # How quickly the alien point values increase
-        self.score_scale = 1.5
+        self.bullets_allowed = 3 # Unless the difficulty sets its own.
+        self.bullet_speed = 500.0
 
         # Power up settings
         self.powerup_bullet_width = 10 # wider bullet width
         self.powerup_bullet_height = 40 # longer bullet height
         self.powerup_bullet_color = (255, 0, 0) 
-        self.powerup_bullet_speed = 1.5 * self.bullet_speed # faster bullets.
-        self.powerup_speed = 1.5
+        self.powerup_bullet_speed_factor = 1.5 # faster than the level's bullets.
+        self.powerup_speed = 750.0
 
+        self.fleet_layer_threshold = 500 # Fleets this big are drawn as one pre-rendered image.
+
+        # Difficulties: speeds, points and drop speed for every level, plus
+        # anything else a mode changes, compiled from a data file.
+        self.difficulties = DifficultyBook('files/difficulties.json')
         self.initialize_dynamic_settings()
 
-    def initialize_dynamic_settings(self):
-        """Initialize settings that change throughout the game."""
-        self.ship_speed = 0.5
-        self.bullet_speed = 1.0
-        self.alien_speed = 0.25
+    def initialize_dynamic_settings(self, difficulty='normal'):
+        """Initialize settings that change throughout the game, for level 1
+        of difficulty."""
+        self.difficulty_profile = self.difficulties[difficulty]
+        self.difficulty = difficulty
 
         # fleet_direction of 1 represents right; -1 represents left
         self.fleet_direction = 1
 
-        # Scoring
-        self.alien_points = 50
-
-    def initialize_hard_dynamic_settings(self):
-        """Initialize settings that change during the game, specific to hard mode."""
-        self.ship_speed = 0.75
-        self.bullet_speed = 2.0
-        self.alien_speed = 0.5
-        self.fleet_direction = 1
+        self.level_index = 0
+        self._apply_level()
 
-        # Scoring
-        self.alien_points = 75
+    def _apply_level(self):
+        """Copy the current level's speeds and points out of the table."""
+        (self.ship_speed, self.bullet_speed, self.alien_speed,
+            self.alien_points, self.fleet_drop_speed) = (
+            self.difficulty_profile.level(self.level_index))
 
-    def initialize_nightmare_dynamic_settings(self):
-        """Initialize settings that change during the game, specific to nightmare mode."""
-        self.ship_speed = 2.0
-        self.bullet_speed = 3.0
-        self.alien_speed = 1
-        self.fleet_direction = 1 
-
-        # Scoring
-        self.alien_points = 200
+    def max_bullets(self):
+        """Return how many bullets may be in flight at once."""
+        return self.difficulty_profile.bullets_allowed or self.bullets_allowed
 
     def increase_speed(self):
-        """Increase speed settings and alien point values."""
-        self.ship_speed *= self.speedup_scale
-        self.bullet_speed *= self.speedup_scale
-        self.alien_speed *= self.speedup_scale
-
-        self.alien_points = int(self.alien_points * self.score_scale)
+        """Move on to the next level's speeds and alien point values."""
+        self.level_index += 1
+        self._apply_level()
         
 
 
@@ -3,48 +3,55 @@
 import pygame
 from pygame.sprite import Sprite
 
+from timestep import lerp
+
 class Ship(Sprite):
     """A class to manage the ship."""
 
     def __init__(self, ai_game):
         """Initialize the ship and set its starting position."""
         super().__init__()
-        self.screen = ai_game.screen
         self.settings = ai_game.settings
         self.screen_rect = ai_game.screen.get_rect()
 
-        # Load the ship image and get its rect.
-        self.image = pygame.image.load('images/ship.bmp')
-        self.rect = self.image.get_rect()
+        # Find the ship image in the atlas and get its rect.
+        self.atlas, self.area = ai_game.assets.region('images/ship.bmp')
+        self.rect = pygame.Rect((0, 0), self.area.size)
 
         # Start each new ship at the bottom center of the screen.
         self.rect.midbottom = self.screen_rect.midbottom
 
-        # Store a decimal value for the ship's horizontal position.
+        # Store a decimal value for the ship's horizontal position, and the
+        # value from the previous step for drawing between steps.
         self.x = float(self.rect.x)
+        self.prev_x = self.x
 
         # Movement flags
         self.moving_right = False
         self.moving_left = False
 
-    def update(self):
+    def update(self, dt):
         """Update the ship's position based on the movement flag."""
         # Update the ship's x value, not the rect.
+        self.prev_x = self.x
+        step = self.settings.ship_speed * dt
         if self.moving_right and self.rect.right < self.screen_rect.right:
-            self.x += self.settings.ship_speed
+            self.x += step
         if self.moving_left and self.rect.left > 0:
-            self.x -= self.settings.ship_speed
+            self.x -= step
 
         # Update rect object from self.x.
         self.rect.x = self.x
 
-    def blitme(self):
-        """Draw the ship at its current location."""
-        self.screen.blit(self.image, self.rect)
+    def draw_pos(self, alpha=1.0):
+        """Return where to draw the ship between its last two steps."""
+        return (lerp(self.prev_x, self.x, alpha), self.rect.y)
 
-    def center_ship(self):
-        """Center the ship on the screen."""
+    def center_ship(self, offset=0):
+        """Center the ship on the screen, offset pixels to the right."""
         self.rect.midbottom = self.screen_rect.midbottom
+        self.rect.x += offset
         self.x = float(self.rect.x)
+        self.prev_x = self.x
 
 
@@ -0,0 +1,130 @@
+# Part of Alien Invasion game. Uniform grid for broad-phase collision tests.
+
+import numpy as np
+
+class SpatialGrid:
+    """A class to bucket equal-sized boxes by the grid cell of their corner.
+
+    Cells are at least as big as a box, so a box can only overlap a rect if
+    its top-left corner lies in the cells covering the rect, or the row and
+    column of cells just above and to the left.
+    """
+
+    def __init__(self, box_width, box_height):
+        """Initialize an empty grid with one cell per box size."""
+        self.width = box_width
+        self.height = box_height
+        self.clear()
+
+    def clear(self):
+        """Remove every box from the grid."""
+        self.cells = {}
+        self.boxes = {}
+
+    def load(self, cells, boxes):
+        """Replace the grid's contents with copies of another grid's."""
+        self.cells = {cell: bucket[:] for cell, bucket in cells.items()}
+        self.boxes = boxes.copy()
+
+    def insert(self, slot, x, y):
+        """Add the box for slot with its top-left corner at (x, y)."""
+        cell = (int(x // self.width), int(y // self.height))
+        self.cells.setdefault(cell, []).append(slot)
+        self.boxes[slot] = (x, y, cell)
+
+    def remove(self, slot):
+        """Take the box for slot out of the grid."""
+        x, y, cell = self.boxes.pop(slot)
+        bucket = self.cells[cell]
+        bucket.remove(slot)
+        if not bucket:
+            del self.cells[cell]
+
+    def query(self, left, top, right, bottom):
+        """Return the slots whose boxes overlap the given edges."""
+        width, height = self.width, self.height
+        first_col, last_col = int(left // width) - 1, int(right // width)
+        first_row, last_row = int(top // height) - 1, int(bottom // height)
+
+        slots = []
+        cells, boxes = self.cells, self.boxes
+        for col in range(first_col, last_col + 1):
+            for row in range(first_row, last_row + 1):
+                for slot in cells.get((col, row), ()):
+                    x, y, cell = boxes[slot]
+                    if (x < right and x + width > left and
+                            y < bottom and y + height > top):
+                        slots.append(slot)
+        return slots
+
+
+class CellTable:
+    """A class to map each grid cell to the one box whose corner lies in it.
+
+    The array twin of SpatialGrid, for layouts that never put two boxes in
+    a cell: many rects can then be tested against every box in a handful
+    of NumPy operations instead of one query each.
+    """
+
+    def __init__(self, box_width, box_height, x, y):
+        """Index boxes with top-left corners at the arrays x, y (x, y >= 0)."""
+        self.width = box_width
+        self.height = box_height
+        self.x = x
+        self.y = y
+        self.col = (x // box_width).astype(int)
+        self.row = (y // box_height).astype(int)
+        shape = ((self.row.max() + 1, self.col.max() + 1) if len(x)
+            else (0, 0))
+        self.cells = np.full(shape, -1, dtype=np.int32)
+        self.cells[self.row, self.col] = np.arange(len(x))
+
+    @classmethod
+    def build(cls, box_width, box_height, x, y):
+        """Return a CellTable for the boxes, or None if two share a cell."""
+        if len(x) and (x.min() < 0 or y.min() < 0):
+            return None
+        table = cls(box_width, box_height, x, y)
+        if np.count_nonzero(table.cells >= 0) != len(x):
+            return None
+        return table
+
+    def copy(self):
+        """Return a table sharing the box positions with its own cells."""
+        table = object.__new__(CellTable)
+        table.__dict__.update(self.__dict__)
+        table.cells = self.cells.copy()
+        return table
+
+    def remove(self, slots):
+        """Take the boxes for slots out of the table."""
+        self.cells[self.row[slots], self.col[slots]] = -1
+
+    def query_many(self, left, top, right, bottom):
+        """Return (indices, slots) of every overlap between the rects, given
+        as arrays of edges, and the boxes, in rect order."""
+        width, height = self.width, self.height
+        rows, cols = self.cells.shape
+        if not len(left) or not rows:
+            empty = np.zeros(0, dtype=int)
+            return empty, empty
+        first_col = (left // width).astype(int) - 1
+        first_row = (top // height).astype(int) - 1
+        span_cols = int(((right // width).astype(int) - first_col).max()) + 1
+        span_rows = int(((bottom // height).astype(int) - first_row).max()) + 1
+
+        # Every cell in a fixed window from each rect's first cell.
+        col = (first_col[:, None] + np.arange(span_cols))[:, None, :]
+        row = (first_row[:, None] + np.arange(span_rows))[:, :, None]
+        inside = (row >= 0) & (row < rows) & (col >= 0) & (col < cols)
+        slots = np.where(inside, self.cells[np.clip(row, 0, rows - 1),
+            np.clip(col, 0, cols - 1)], -1)
+        index = np.broadcast_to(np.arange(len(left))[:, None, None],
+            slots.shape)
+
+        occupied = slots >= 0
+        index, slots = index[occupied], slots[occupied]
+        x, y = self.x[slots], self.y[slots]
+        overlap = ((x < right[index]) & (x + width > left[index]) &
+            (y < bottom[index]) & (y + height > top[index]))
+        return index[overlap], slots[overlap]
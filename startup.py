@@ -0,0 +1,75 @@
+# Part of Alien Invasion game. Startup stages, their timings and the
+# loading screen shown while assets load.
+
+from time import perf_counter
+
+import pygame
+
+class StartupTimer:
+    """A class to time each stage from launch to the first frame."""
+
+    def __init__(self):
+        """Start the clock."""
+        self.start = self.last = perf_counter()
+        self.stages = []
+
+    def stage(self, name):
+        """Charge the time since the last stage to name."""
+        now = perf_counter()
+        self.stages.append((name, now - self.last))
+        self.last = now
+
+    def total(self):
+        """Return the seconds from launch to the last stage."""
+        return self.last - self.start
+
+    def report(self):
+        """Return a table of stage times ending with time to first frame."""
+        width = max(len(name) for name, _ in self.stages)
+        lines = ["Startup:"]
+        lines += [f"  {name:<{width}} {seconds * 1000:8.1f} ms"
+            for name, seconds in self.stages]
+        lines.append(f"  {'total':<{width}} {self.total() * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+class LoadingScreen:
+    """A class to show a progress bar until background loads finish.
+
+    Draws nothing but rects, so it needs no fonts or images of its own.
+    """
+
+    def __init__(self, presenter, bg_color, bar_color=(60, 60, 60)):
+        """Lay out the bar in the middle of presenter's screen."""
+        self.presenter = presenter
+        self.screen = presenter.screen
+        self.bg_color = bg_color
+        self.bar_color = bar_color
+        self.frame = pygame.Rect(0, 0, 400, 24)
+        self.frame.center = self.screen.get_rect().center
+
+    def draw(self, fraction):
+        """Draw the bar filled to fraction and show it."""
+        self.screen.fill(self.bg_color)
+        pygame.draw.rect(self.screen, self.bar_color, self.frame, 2)
+        bar = self.frame.inflate(-8, -8)
+        bar.width = round(bar.width * fraction)
+        self.screen.fill(self.bar_color, bar)
+        self.presenter.present()
+
+    def wait(self, *progress, fps=60):
+        """Keep the window responsive until every progress() reaches 1.
+
+        progress are callables returning how much of a load is done, from 0
+        to 1. Returns False if the player closed the window.
+        """
+        clock = pygame.time.Clock()
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return False
+            fraction = sum(done() for done in progress) / len(progress)
+            self.draw(fraction)
+            if fraction >= 1:
+                return True
+            clock.tick(fps)
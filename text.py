@@ -0,0 +1,90 @@
+# Part of Alien Invasion game. Text drawn from pre-rendered glyphs.
+
+from collections import OrderedDict
+
+import pygame
+
+DIGITS = '0123456789,'
+
+class GlyphAtlas:
+    """A class to render strings by blitting glyphs rendered once.
+
+    Every glyph (a single character or a whole label) is rendered into one
+    atlas surface when the atlas is made. Strings made only of glyphs are
+    put together with blits; anything else falls back to font.render().
+    Recent results are kept in a small cache.
+    """
+
+    def __init__(self, font, color, background=None, glyphs=DIGITS,
+            labels=(), cache_size=16):
+        """Render glyphs and labels with font into the atlas."""
+        self.font = font
+        self.color = color
+        self.background = background
+        self.height = font.get_height()
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+
+        rendered = [(glyph, self._render(glyph))
+            for glyph in dict.fromkeys((*glyphs, *labels))]
+        width = sum(image.get_width() for glyph, image in rendered)
+        self.image = self._surface(width, self.height)
+
+        self.areas = {}
+        x = 0
+        for glyph, image in rendered:
+            self.image.blit(image, (x, 0))
+            self.areas[glyph] = pygame.Rect(x, 0, image.get_width(),
+                self.height)
+            x += image.get_width()
+
+    def _render(self, text):
+        """Render text directly with the font."""
+        return self.font.render(text, True, self.color, self.background)
+
+    def _surface(self, width, height):
+        """Make a blank surface in the atlas's background."""
+        if self.background is None:
+            return pygame.Surface((width, height), pygame.SRCALPHA)
+        surface = pygame.Surface((width, height))
+        surface.fill(self.background)
+        return surface
+
+    def render(self, text):
+        """Return an image of text, reusing glyphs and recent results."""
+        image = self.cache.get(text)
+        if image is not None:
+            self.hits += 1
+            self.cache.move_to_end(text)
+            return image
+
+        self.misses += 1
+        image = self._compose(text)
+        self.cache[text] = image
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return image
+
+    def _compose(self, text):
+        """Put text together from glyphs, if it is made only of glyphs."""
+        areas = self.areas
+        if text in areas:
+            glyphs = [areas[text]]
+        elif all(char in areas for char in text):
+            glyphs = [areas[char] for char in text]
+        else:
+            return self._render(text)
+
+        image = self._surface(sum(area.width for area in glyphs), self.height)
+        # Glyphs never overlap, so on a transparent image a MAX blend copies
+        # each one exactly instead of blending it with the empty pixels.
+        flags = pygame.BLEND_RGBA_MAX if self.background is None else 0
+        x = 0
+        sequence = []
+        for area in glyphs:
+            sequence.append((self.image, (x, 0), area, flags))
+            x += area.width
+        image.blits(sequence, False)
+        return image
@@ -0,0 +1,44 @@
+# Part of Alien Invasion game. Fixed timestep scheduler for the main loop.
+
+class FixedTimestep:
+    """A class to turn variable frame times into fixed simulation steps."""
+
+    def __init__(self, tick_rate, max_frame_time=0.25):
+        """Initialize the step size and an empty accumulator."""
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+
+        # Steps the game has simulated; the game's clock for timed events.
+        self.ticks = 0
+
+    def advance(self, frame_time):
+        """Add frame_time seconds and return how many steps to simulate.
+
+        Long frames are clamped to max_frame_time so a stall doesn't turn
+        into a burst of catch-up steps.
+        """
+        self.accumulator += min(frame_time, self.max_frame_time)
+        steps = int(self.accumulator / self.dt)
+        self.accumulator -= steps * self.dt
+        return steps
+
+    @property
+    def alpha(self):
+        """Fraction of a step left over, used to interpolate drawing."""
+        return self.accumulator / self.dt
+
+    def seconds_to_ticks(self, seconds):
+        """Return the number of steps that make up seconds."""
+        return round(seconds * self.tick_rate)
+
+    @property
+    def time_ms(self):
+        """Simulated time in milliseconds."""
+        return self.ticks * 1000 // self.tick_rate
+
+
+def lerp(previous, current, alpha):
+    """Blend a previous and a current position for drawing."""
+    return previous + (current - previous) * alpha